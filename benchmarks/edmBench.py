@@ -0,0 +1,233 @@
+# Copyright 2023 Canadian Light Source, Inc. See The file COPYRIGHT in this distribution for further information.
+#
+# MODULE LEVEL: top
+#
+# Micro-benchmarks for the pure-python paths that are run for every
+# update: CALC expressions, color rules, macro expansion, the decoding
+# of array properties from .edl files, and text formatting.
+#
+# This is a standalone runner, and does not need a display:
+#   python benchmarks/edmBench.py                   - run, and compare against the baseline
+#   python benchmarks/edmBench.py --save            - run, and record the results as the baseline
+#   python benchmarks/edmBench.py -k macro          - only run benchmarks with 'macro' in the name
+#
+# Results are reported in microseconds per call, as the best of several
+# repeats. Any benchmark that is slower than its baseline by more than
+# the threshold is flagged, and the exit status is 1. Baselines are machine
+# specific, and should be recorded on the machine doing the comparison.
+#
+# xyGraphClass has a separate benchmark, plotBench.py, run under a simulated
+# PV load.
+
+import os
+import sys
+import json
+import time
+import argparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+benchDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(benchDir))
+
+from PyQt5.QtWidgets import QApplication
+
+from pyedm import edmEditWidget
+from pyedm.edmField import edmField, edmTag
+from pyedm.edmparsecalc import Postfix
+from pyedm.edmColors import colorTable
+from pyedm.edmMacro import macroDictionary
+from pyedm import edmProperty
+from pyedm import edmTextFormat
+
+# representative expressions from CALC\{...}(...) PV names in .edl files
+calcCorpus = [
+    "A+B", "A*1000", "(A>0)?1:0", "A&1", "ABS(A-B)<0.01", "A#0",
+    "SQRT(A*A+B*B)", "A>=B&&C<D", "LOG(A)", "A=1", "(A>>4)&15",
+    "A?B:C?D:E", "NINT(A/B*100)/100", "A<0||A>100", "(A+B+C+D)/4",
+    "A*PI/180", "FLOOR(A)%2", "A|B<<1|C<<2", "EXP(-A/B)*C", "A!=B",
+    "ATAN2(A,B)*R2D",
+    ]
+calcArgs = [1.5, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]
+
+# values that step through the ranges used by the rules in colors.list
+colorValues = [ -2, -1, -0.5, 0, 0.25, 0.5, 0.85, 1, 1.5, 2, 3, 4, 5, 6, 7, 8, 9.5, 11, 12, 15, 44, 46, 80, 100 ]
+
+macroDepth = 20
+
+class benchmark:
+    ''' benchmark - a named function to time, and the number of operations in one call '''
+    def __init__(self, name, fn, ops=1):
+        self.name = name
+        self.fn = fn
+        self.ops = ops
+
+    def run(self, repeat=5, minTime=0.2):
+        ''' run - time the function, returning the best time per operation in microseconds '''
+        loops = 1
+        while True:
+            elapsed = self.timeLoops(loops)
+            if elapsed >= minTime/repeat:
+                break
+            loops = loops*2
+        best = elapsed
+        for idx in range(repeat-1):
+            best = min(best, self.timeLoops(loops))
+        return best * 1e6 / (loops * self.ops)
+
+    def timeLoops(self, loops):
+        fn = self.fn
+        start = time.perf_counter()
+        for idx in range(loops):
+            fn()
+        return time.perf_counter() - start
+
+def calcBenchmarks():
+    parsers = [ Postfix(expr) for expr in calcCorpus ]
+    def parse():
+        p = Postfix()
+        for expr in calcCorpus:
+            p.parseExpression(expr)
+    def calculate():
+        for p in parsers:
+            p.calculate(calcArgs)
+    return [ benchmark("calc.parseExpression", parse, len(calcCorpus)),
+             benchmark("calc.calculate", calculate, len(parsers)) ]
+
+def colorBenchmarks(colorfile):
+    colorTable.loadColor(colorfile)
+    rules = [ rule for rule in colorTable.colorNames.values() if rule.isRule() and len(rule.ruleList) > 1 ]
+    # the color lookup prints a message when there is no default; keep that out of the timing
+    rules = [ rule for rule in rules if rule.ruleList[-1].op == rule.ruleList[-1].DEFAULT ]
+    def getColor():
+        for rule in rules:
+            for value in colorValues:
+                rule.getColor(value)
+    return [ benchmark("color.getColor", getColor, len(rules)*len(colorValues)) ]
+
+def macroChain():
+    ''' macroChain - build a chain of tables, as happens with nested embedded
+        windows and related displays, each passing macros on to the next.
+    '''
+    table = macroDictionary()
+    table.addMacro("SYS", "BL1")
+    table.addMacro("DEV", "$(SYS):DEV")
+    for level in range(macroDepth):
+        table = table.newTable()
+        table.addMacro(f"L{level}", f"$(SYS)-{level}")
+        table.addMacro("IDX", f"{level}")
+    return table
+
+macroInputs = [
+    "$(DEV):setpoint", "$(SYS)$(IDX)", "$(L0):$(L5):$(L10)", "plain text",
+    "$(DEV):status.SEVR", "CALC\\{A+B}($(DEV):a,$(DEV):b)", "$(UNDEFINED):value",
+    ]
+
+def macroBenchmarks():
+    table = macroChain()
+    top = table
+    while top.parent != None:
+        top = top.parent
+    for input in macroInputs:
+        table.expand(input)     # report any missing macros before timing
+    def cached():
+        for input in macroInputs:
+            table.expand(input)
+    def cold():
+        top.invalidate()
+        for input in macroInputs:
+            table.expand(input)
+    return [ benchmark("macro.expand", cached, len(macroInputs)),
+             benchmark("macro.expand.cold", cold, len(macroInputs)) ]
+
+def decodeBenchmarks():
+    textField = edmField("value", edmEditWidget.edmEditTextBox, array=True)
+    textTag = edmTag("value", [ f'"line {idx} \\"quoted\\""' for idx in range(20) ], textField)
+    intField = edmField("xPoints", edmEditWidget.edmEditInt, array=True, defaultValue=0)
+    intTag = edmTag("xPoints", [ f"{idx} {idx*7}" for idx in range(100) ], intField)
+    indexField = edmField("symbol", edmEditWidget.edmEditString, array=True, defaultValue="")
+    indexTag = edmTag("symbol", [ f'{idx*2} "SYM{idx}"' for idx in range(8) ], indexField)
+    def text():
+        edmProperty.decode(textTag)
+    def ints():
+        edmProperty.decode(intTag)
+    def indexed():
+        edmProperty.decode(indexTag, count=16)
+    return [ benchmark("decode.text", text, len(textTag.value)),
+             benchmark("decode.int", ints, len(intTag.value)),
+             benchmark("decode.indexed", indexed, len(indexTag.value)) ]
+
+formatValues = [ 0, 1, -2.5, 3.14159265, 1234567.891, 1e-7, 42, "17.5" ]
+formatModes = [ edmTextFormat.convDefault, edmTextFormat.convDecimal, edmTextFormat.convHex,
+                edmTextFormat.convEngineer, edmTextFormat.convExp ]
+
+def formatBenchmarks():
+    formatters = [ edmTextFormat.buildFormatter(conv, 3, "mA", True) for conv in formatModes ]
+    def convert():
+        for conv in formatModes:
+            for value in formatValues:
+                conv(value, charValue=None, precision=3, units="mA", showUnits=True)
+    def compiled():
+        for formatter in formatters:
+            for value in formatValues:
+                formatter(value)
+    count = len(formatModes)*len(formatValues)
+    return [ benchmark("format.conv", convert, count),
+             benchmark("format.compiled", compiled, count) ]
+
+def loadBaseline(filename):
+    try:
+        with open(filename) as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        return {}
+
+def saveBaseline(filename, results):
+    with open(filename, "w") as fp:
+        json.dump(results, fp, indent=2, sort_keys=True)
+        fp.write("\n")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="pyedm micro-benchmarks")
+    parser.add_argument("--baseline", default=os.path.join(benchDir, "baseline.json"), help="file holding baseline results")
+    parser.add_argument("--save", action="store_true", help="record these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.20, help="fractional slow-down reported as a regression")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timing repeats")
+    parser.add_argument("--colorfile", default=os.path.join(os.path.dirname(benchDir), "pyedm", "colors.list"))
+    parser.add_argument("-k", dest="select", default=None, help="only run benchmarks with this in the name")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(["edmBench"])
+
+    benchmarks = calcBenchmarks() + colorBenchmarks(args.colorfile) + macroBenchmarks() + decodeBenchmarks() + formatBenchmarks()
+    if args.select:
+        benchmarks = [ b for b in benchmarks if args.select in b.name ]
+
+    baseline = loadBaseline(args.baseline)
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<24} {'us/op':>10} {'baseline':>10} {'change':>8}")
+    for bench in benchmarks:
+        usec = bench.run(repeat=args.repeat)
+        results[bench.name] = usec
+        if bench.name in baseline:
+            change = usec/baseline[bench.name] - 1.0
+            flag = ""
+            if change > args.threshold:
+                flag = "  REGRESSION"
+                regressions.append(bench.name)
+            print(f"{bench.name:<24} {usec:10.3f} {baseline[bench.name]:10.3f} {change*100:+7.1f}%{flag}")
+        else:
+            print(f"{bench.name:<24} {usec:10.3f} {'-':>10} {'':>8}")
+
+    if args.save:
+        baseline.update(results)
+        saveBaseline(args.baseline, baseline)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold*100:.0f}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+# Copyright 2023 Canadian Light Source, Inc. See The file COPYRIGHT in this distribution for further information.
+#
+# MODULE LEVEL: top
+#
+# Benchmark for xyGraphClass under synthetic load, to show how the cost of
+# a plot grows with the number of curves, the update rate and the number of
+# points. Each update mode (y, xAndY, trigger and timer) is measured with a
+# plot built from an .edl description in the style of testDir/testPlot*.edl,
+# using LOC PVs. A simulated PV source then delivers values to the callbacks
+# of those PVs, as the channel access layer does, and frames are redisplayed
+# and rendered at the edmApp redisplay rate in simulated time.
+#
+# This is a standalone runner, and does not need a display:
+#   python benchmarks/plotBench.py                          - run, and compare against the baseline
+#   python benchmarks/plotBench.py --save                   - run, and record the results as the baseline
+#   python benchmarks/plotBench.py -k trigger               - only run modes with 'trigger' in the name
+#   python benchmarks/plotBench.py --curves 16 --points 50000 --rate 10 --waveform
+#
+# Reported for each mode:
+#   callback - CPU time per PV update spent in the callbacks, in microseconds
+#   setData  - time per frame spent in pyqtgraph setData, in milliseconds
+#   frame    - time per frame to redisplay and render the plot, in milliseconds
+#   memory   - Python and NumPy memory per curve after the run, in kilobytes
+#
+# Baselines are kept with those of edmBench.py, under names that include the
+# number of curves, points and rate, so that runs of different sizes are
+# compared only with each other.
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+benchDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(benchDir))
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication, QWidget
+from PyQt5.QtGui import QImage, QPainter
+
+from pyedm.edmApp import edmApp
+from pyedm.edmMacro import macroDictionary
+from pyedm.edmScreen import edmScreen
+from pyedm.edmWindowWidget import generateWindow
+from pyedm.edmMain import pyedm
+from edmBench import loadBaseline, saveBaseline
+
+# mode : (plotUpdateMode, x PV for each curve, trigger PV, updateTimerMs)
+benchModes = {
+    "y"       : ("y", False, False, 0),
+    "xAndY"   : ("xAndY", True, False, 0),
+    "trigger" : ("trigger", True, True, 0),
+    "timer"   : ("y", False, False, 100),
+    }
+
+screenText = '''4 0 1
+beginScreenProperties
+major 4
+minor 0
+release 1
+x 0
+y 0
+w 820
+h 620
+font "helvetica-bold-r-14.0"
+ctlFont "helvetica-bold-r-14.0"
+btnFont "helvetica-bold-r-14.0"
+fgColor index 14
+bgColor index 3
+textColor index 14
+ctlFgColor1 index 14
+ctlFgColor2 index 15
+ctlBgColor1 index 5
+ctlBgColor2 index 14
+topShadowColor index 2
+botShadowColor index 7
+endScreenProperties
+
+# (X-Y Graph)
+object xyGraphClass
+beginObjectProperties
+major 4
+minor 9
+release 0
+# Geometry
+x 10
+y 10
+w 800
+h 600
+# Appearance
+border
+plotAreaBorder
+fgColor index 14
+bgColor index 5
+gridColor index 14
+font "helvetica-bold-r-14.0"
+# Operating Modes
+plotMode "plotLastNPts"
+nPts {points}
+{options}# X axis properties
+showXAxis
+xAxisSrc "AutoScale"
+xAxisStyle "{xAxisStyle}"
+# Y axis properties
+showYAxis
+yAxisSrc "AutoScale"
+# Traces
+numTraces {curves}
+{traces}endObjectProperties
+'''
+
+def plotScreen(mode, curves, points, waveform):
+    ''' plotScreen - .edl text for a plot of 'curves' curves in one of the benchModes '''
+    updateMode, hasX, hasTrigger, timerMs = benchModes[mode]
+    options = ""
+    if hasTrigger:
+        options += f'triggerPv "LOC\\\\bench{mode}Trigger=i:0"\n'
+    if timerMs:
+        options += f"updateTimerMs {timerMs}\n"
+    traces = ""
+    if hasX:
+        traces += "xPv {\n" + "".join( [ f'  {idx} "LOC\\\\bench{mode}X{idx}=d:0"\n' for idx in range(curves) ] ) + "}\n"
+    traces += "yPv {\n" + "".join( [ f'  {idx} "LOC\\\\bench{mode}Y{idx}=d:0"\n' for idx in range(curves) ] ) + "}\n"
+    traces += "plotUpdateMode {\n" + "".join( [ f'  {idx} "{updateMode}"\n' for idx in range(curves) ] ) + "}\n"
+    traces += "plotColor {\n" + "".join( [ f'  {idx} index {20+idx%20}\n' for idx in range(curves) ] ) + "}\n"
+    xAxisStyle = "linear" if hasX or waveform else "time"
+    return screenText.format(points=points, options=options, xAxisStyle=xAxisStyle, curves=curves, traces=traces)
+
+class simulatedPV:
+    ''' simulatedPV - delivers values to the callbacks of a PV, in the way the EPICS channel layer does '''
+    def __init__(self, pv):
+        self.pv = pv
+        self.name = pv.getPVname()
+
+    def update(self, value, count):
+        pv = self.pv
+        pv.isValid = True
+        pv.value = value
+        for fn in pv.callbackList:
+            fn[0](fn[1], pvname=self.name, chid=0, pv=pv, value=value, count=count, units="", severity=0, userArgs=fn[2])
+
+class plotLoad:
+    ''' plotLoad - a plot built for one of the benchModes, and the simulated PVs that feed it '''
+    def __init__(self, mode, args):
+        self.mode = mode
+        self.curves = args.curves
+        fd, self.filename = tempfile.mkstemp(suffix=".edl", prefix="plotBench")
+        with os.fdopen(fd, "w") as fp:
+            fp.write(plotScreen(mode, args.curves, args.points, args.waveform))
+        macroTable = macroDictionary()
+        self.window = generateWindow(edmScreen(self.filename, macroTable), macroTable=macroTable)
+        self.plot = [ widget for widget in self.window.findChildren(QWidget) if type(widget).__name__ == "xyGraphClass" ][0]
+        self.inputs = []
+        for curve in self.plot.curves:
+            self.inputs += [ simulatedPV(pv) for pv in (curve.xPv, curve.yPv) if pv is not None ]
+        self.trigger = None
+        if benchModes[mode][2]:
+            self.trigger = simulatedPV(self.plot.triggerPV)
+        self.setDataTime = 0.0
+        for curve in self.plot.curves:
+            self.timeSetData(curve)
+        self.image = QImage(self.plot.size(), QImage.Format_ARGB32)
+
+    def timeSetData(self, curve):
+        setData = curve.setData
+        def timedSetData(*args, **kw):
+            start = time.perf_counter()
+            try:
+                return setData(*args, **kw)
+            finally:
+                self.setDataTime += time.perf_counter() - start
+        curve.setData = timedSetData
+
+    def render(self):
+        painter = QPainter(self.image)
+        self.plot.render(painter)
+        painter.end()
+
+    def close(self):
+        self.window.edmCleanup()
+        self.window.close()
+        self.window.deleteLater()
+        os.remove(self.filename)
+
+def sampleValues(args):
+    ''' sampleValues - values for the simulated PVs: scalars, or waveforms of 'points' values '''
+    rng = np.random.default_rng(1)
+    if args.waveform:
+        phase = np.linspace(0, 8*np.pi, args.points)
+        return [ np.sin(phase + idx) + rng.normal(0, 0.05, args.points) for idx in range(16) ], args.points
+    return [ float(value) for value in np.sin(np.arange(1024)/50.0) + rng.normal(0, 0.05, 1024) ], 1
+
+def runMode(mode, args, render=True):
+    ''' runMode - feed a plot for 'duration' seconds of simulated time. Returns the plotLoad
+        and the callback time per update, setData time per frame, and frame time per frame.
+    '''
+    load = plotLoad(mode, args)
+    values, count = sampleValues(args)
+    fps = 1000.0/edmApp.redisplayInterval
+    frames = max(int(args.duration*fps), 1)
+    timerMs = load.plot.updateTimerMs
+    nextTimer = 0.0
+    due = 0.0
+    sample = 0
+    updates = 0
+    callbackTime = frameTime = 0.0
+    load.setDataTime = 0.0
+    for frame in range(frames):
+        due += args.rate/fps
+        start = time.process_time()
+        while due >= 1.0:
+            due -= 1.0
+            value = values[sample % len(values)]
+            for pv in load.inputs:
+                pv.update(value, count)
+            if load.trigger is not None:
+                load.trigger.update(sample, 1)
+            sample += 1
+            updates += len(load.inputs) + (load.trigger is not None)
+        callbackTime += time.process_time() - start
+        start = time.perf_counter()
+        if timerMs and frame*1000.0/fps >= nextTimer:
+            nextTimer += timerMs
+            load.plot.timerEvent(None)
+        edmApp.onTimer()
+        if render:
+            load.render()
+        frameTime += time.perf_counter() - start
+    return load, callbackTime*1e6/max(updates, 1), load.setDataTime*1e3/frames, frameTime*1e3/frames
+
+def memoryPerCurve(mode, args):
+    ''' memoryPerCurve - kilobytes allocated by Python and NumPy for each curve, after a run '''
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    load = runMode(mode, args, render=False)[0]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    load.close()
+    return used/1024.0/args.curves
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="pyedm xyGraphClass benchmark")
+    parser.add_argument("--baseline", default=os.path.join(benchDir, "baseline.json"), help="file holding baseline results")
+    parser.add_argument("--save", action="store_true", help="record these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.20, help="fractional slow-down reported as a regression")
+    parser.add_argument("--curves", type=int, default=4, help="number of curves in the plot")
+    parser.add_argument("--points", type=int, default=1000, help="nPts of the plot, and the length of waveforms")
+    parser.add_argument("--rate", type=float, default=100.0, help="updates per second of each PV")
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds of simulated time for each mode")
+    parser.add_argument("--waveform", action="store_true", help="PVs are waveforms of 'points' values, instead of scalars")
+    parser.add_argument("-k", dest="select", default=None, help="only run modes with this in the name")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(["plotBench"])
+    pyedm([])                   # set up edmApp, colors and modules as for the command line
+    edmApp.timer.stop()         # frames are run by runMode, in simulated time
+
+    modes = [ mode for mode in benchModes if args.select is None or args.select in mode ]
+    size = f"{args.curves}x{args.points}{'w' if args.waveform else ''}@{args.rate:g}"
+    baseline = loadBaseline(args.baseline)
+    results = {}
+    regressions = []
+    print(f"{args.curves} curves, {args.points} points, {args.rate:g} updates/s per PV, {'waveforms' if args.waveform else 'scalars'}")
+    print(f"{'mode':<10} {'callback us':>12} {'setData ms':>11} {'frame ms':>9} {'memory kB':>10}")
+    for mode in modes:
+        load, callback, setData, frame = runMode(mode, args)
+        load.close()
+        memory = memoryPerCurve(mode, args)
+        measured = { "callback" : callback, "setData" : setData, "frame" : frame, "memory" : memory }
+        print(f"{mode:<10} {callback:12.2f} {setData:11.3f} {frame:9.3f} {memory:10.1f}")
+        for name, value in measured.items():
+            key = f"plot.{mode}.{size}.{name}"
+            results[key] = value
+            if key in baseline and value > baseline[key]*(1.0 + args.threshold):
+                change = value/baseline[key] - 1.0
+                print(f"{'':<10} {name} {value:.3f} against baseline {baseline[key]:.3f} {change*100:+.1f}%  REGRESSION")
+                regressions.append(key)
+
+    if args.save:
+        baseline.update(results)
+        saveBaseline(args.baseline, baseline)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold*100:.0f}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
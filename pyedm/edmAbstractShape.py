@@ -4,6 +4,7 @@
 # MODULE LEVEL: high
 
 from enum import Enum
+from pyedm.edmApp import edmApp
 from pyedm.edmWidget import edmWidget
 from .edmField import edmField
 from .edmEditWidget import edmEdit
@@ -14,7 +15,16 @@ from PyQt5.QtCore import Qt
 
 #  a weirdness in shapes is that they have an alarmPv, but it is used as
 # a colorPv. recommend over-writing tags somehow someway.
+#
+# Shapes draw themselves in drawShape(painter). With edmApp.flattenShapes set,
+# classes marked 'flattenable' are hidden, and are drawn by their parent
+# container in its paintEvent (see edmParentSupport.paintFlatChildren). Updates
+# then repaint only the shape's area of the parent. A shape overlapped by a
+# widget below it goes back to being a widget (see checkFlatChildren), so that
+# it is still drawn on top.
 class abstractShape(QFrame, edmWidget):
+    flattenable = False
+    pixmapStatic = True
     lineStyleEnum = Enum("linestyle", "solid dash", start=0)
     edmShapeFields = [
             edmField("lineColor", edmEdit.Color, defaultValue=0),
@@ -32,8 +42,49 @@ class abstractShape(QFrame, edmWidget):
     def __init__(self, parent=None, **kwargs):
         super().__init__(parent, **kwargs)
         self.linewidth = 0
+        self.flattened = False
+
+    def buildFromObject(self, objectDesc, **kw):
+        super().buildFromObject(objectDesc, **kw)
+        if self.flattenable and edmApp.flattenShapes and not self.flattened:
+            parent = self.parentWidget()
+            if getattr(parent, "flatParent", False):
+                QFrame.setVisible(self, False)
+                self.flattened = True
+                parent.addFlatChild(self)
+
+    def unflatten(self):
+        ''' unflatten - draw this shape as a separate widget again '''
+        if not self.flattened:
+            return
+        self.parentWidget().removeFlatChild(self)
+        self.flattened = False
+        QFrame.setVisible(self, getattr(self, "visible", True))
+
+    def flatUpdate(self):
+        ''' flatUpdate - request a repaint of this shape's area of the parent '''
+        parent = self.parentWidget()
+        if parent != None:
+            parent.update(self.geometry())
+
+    def setVisible(self, visible):
+        if self.flattened:
+            self.flatUpdate()       # parent checks self.visible when painting
+            return
+        super().setVisible(visible)
+
+    def setGeometry(self, *args):
+        if self.flattened:
+            self.flatUpdate()
+        super().setGeometry(*args)
+        if self.flattened:
+            self.flatUpdate()
 
     def edmCleanup(self):
+        if self.flattened:
+            try: self.parentWidget().removeFlatChild(self)
+            except (AttributeError, RuntimeError): pass
+            self.flattened = False
         try: self.lineColorInfo.edmCleanup()
         except: pass
         try: self.fillColorInfo.edmCleanup()
@@ -53,8 +104,19 @@ class abstractShape(QFrame, edmWidget):
         pass
 
     def paintEvent(self, event=None):
+        painter = QPainter(self)
+        if event == None:
+            painter.eraseRect(0, 0, self.width(), self.height() )
+        self.drawShape(painter)
+        painter.end()
+
+    def drawShape(self, painter):
+        ''' drawShape(painter) - draw the shape, with (0,0) at the top left of the widget '''
         pass
-        
+
     def redisplay(self):
         self.checkVisible()
-        self.update()
+        if self.flattened:
+            self.flatUpdate()
+        else:
+            self.update()
@@ -27,6 +27,11 @@ class symbolWidget(QWidget,edmWidget, edmParentSupport):
         edmWidget.__init__(self, parent, **kw)
         edmParentSupport.__init__(self, parent, **kw)
 
+    flatParent = True
+
+    def paintEvent(self, event):
+        self.paintFlatChildren(event)
+
 class AbstractSymbolClass(QFrame,edmWidget, edmParentSupport):
     def __init__(self, parent=None, **kw):
         QFrame.__init__(self, parent, **kw)
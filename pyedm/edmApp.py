@@ -16,8 +16,9 @@
 #  which might make remote display requests more doable.
 #
 import os
+import time
 import traceback
-from PyQt5.QtWidgets import QStyle, QStyleFactory   # type: ignore
+from PyQt5.QtWidgets import QApplication, QStyle, QStyleFactory   # type: ignore
 import PyQt5.sip as sip
 
 cur_dir = os.path.dirname(os.path.abspath(__file__))
@@ -67,10 +68,23 @@ class edmAppClass(debugClass):
         self.timer = None
         self.screenList = []
         self.windowList = []
-        self.redisplayList = []
-        self.blinkList = []
+        self.redisplayList = {}     # insertion-ordered set of widgets waiting for redisplay
+        self.frameBudget = 0.05     # seconds of redisplay work per timer tick
+        self.redisplayInterval = 100    # milliseconds between ticks while widgets are waiting
+        self.burstInterval = 20         # ... when the last tick ran out of time
+        self.heldInterval = 500         # ... when the only waiting widgets are in hidden windows
+        self.timerRunning = False
+        self.timerSlow = False      # True when running at heldInterval
+        self.heldWindows = {}       # hidden or minimized window : { widgets waiting for redisplay }
+        self.redisplayStats = { "frames" : 0, "redisplayed" : 0, "carried" : 0, "held" : 0,
+                "queueDepth" : 0, "maxQueueDepth" : 0, "frameTime" : 0.0, "maxFrameTime" : 0.0 }
+        self.blinkList = {}         # widget : set of sources (e.g. reColorInfo) that are blinking
+        self.blinkTimer = None
+        self.blinkPhase = False     # True when blinking colors show their alternate color
+        self.blinkInterval = 500    # milliseconds per phase
         self.cutCopyList = []
         self.allowEdit = True
+        self.flattenShapes = False  # if True, simple shapes are drawn by their parent (see edmParentSupport.addFlatChild)
         self.commonstyle = QStyleFactory.create("Plastique")
         self.edmClasses = {}
         self.delimiter = ':'   # edm compatible, may not be windows friendly
@@ -99,32 +113,155 @@ class edmAppClass(debugClass):
         if "PYTHONEDMPATH" in os.environ:
             self.searchPath = os.environ["PYTHONEDMPATH"].split(edmApp.delimiter) + self.searchPath
         
-    def addBlink(self, widget):
-        if widget not in self.blinkList:
-            self.blinkList.append(widget)
+    def addBlink(self, widget, source=None):
+        ''' addBlink(widget, source) - redisplay 'widget' on every blink phase change,
+            until delBlink has been called for every source that added it.
+        '''
+        try:
+            self.blinkList[widget].add(source)
+        except KeyError:
+            self.blinkList[widget] = { source }
+        if self.blinkTimer == None:
+            from PyQt5.QtCore import QTimer # type: ignore
+            self.blinkTimer = QTimer()
+            self.blinkTimer.timeout.connect(self.onBlink)
+        if not self.blinkTimer.isActive():
+            self.blinkTimer.start(self.blinkInterval)
 
-    def delBlink(self, widget):
-        if widget in self.blinkList:
-            self.blinkList.remove(widget)
+    def delBlink(self, widget, source=None):
+        ''' delBlink(widget, source) - remove a blink request. If source is None,
+            remove all blink requests for the widget.
+        '''
+        sources = self.blinkList.get(widget)
+        if sources == None:
+            return
+        sources.discard(source)
+        if source == None or len(sources) == 0:
+            del self.blinkList[widget]
+        if len(self.blinkList) == 0 and self.blinkTimer != None:
+            self.blinkTimer.stop()
+
+    def onBlink(self):
+        '''
+        onBlink - flip the shared blink phase, and redisplay all
+        the blinking widgets. One timer serves every blinking widget, so
+        all the widgets on all the screens blink together.
+        '''
+        self.blinkPhase = not self.blinkPhase
+        for widget in list(self.blinkList):
+            if sip.isdeleted(widget):
+                self.delBlink(widget)
+                continue
+            try:
+                if self.windowHidden(widget.window()):
+                    continue
+                widget.redisplay()
+            except:
+                print(f"blink redisplay failure for {widget}")
+                traceback.print_exc()
+                self.delBlink(widget)
 
     def startTimer(self):
         if self.timer == None:
             from PyQt5.QtCore import QTimer # type: ignore
             self.timer = QTimer()
             self.timer.timeout.connect(self.onTimer)
-            self.timer.start(100)
+            self.timerRunning = True
+            self.timer.start(self.redisplayInterval)
+
+    def wakeTimer(self):
+        ''' wakeTimer - restart the redisplay timer at the normal rate, after it has stopped
+            or slowed down for lack of work.
+            PV callbacks may arrive on another thread, so the start is queued to the timer's thread.
+        '''
+        if self.timer == None or (self.timerRunning and not self.timerSlow):
+            return
+        self.timerRunning = True
+        self.timerSlow = False
+        from PyQt5.QtCore import QThread, QMetaObject, Qt, Q_ARG  # type: ignore
+        if QThread.currentThread() == self.timer.thread():
+            self.timer.start(self.redisplayInterval)
+        else:
+            QMetaObject.invokeMethod(self.timer, "start", Qt.QueuedConnection, Q_ARG(int, self.redisplayInterval))
+
+    def scheduleTimer(self, carried):
+        ''' scheduleTimer(carried) - choose the next tick: soon if work was
+            carried over, at the normal rate if widgets are waiting, slowly if
+            only hidden windows have work, and not at all when idle.
+        '''
+        self.timerSlow = False
+        if len(self.redisplayList) > 0:
+            interval = self.burstInterval if carried else self.redisplayInterval
+        elif len(self.heldWindows) > 0:
+            interval = self.heldInterval
+            self.timerSlow = True
+        else:
+            self.timerRunning = False
+            self.timer.stop()
+            if len(self.redisplayList) > 0:     # queued while stopping
+                self.wakeTimer()
+            return
+        if self.timer.interval() != interval:
+            self.timer.setInterval(interval)
+
+    def windowHidden(self, window):
+        ''' windowHidden(window) - true if nothing in this top-level window can be seen '''
+        return not window.isVisible() or window.isMinimized()
+
+    def exposeWindow(self, window):
+        ''' exposeWindow(window) - a window has been shown or restored: queue the widgets
+            that were waiting for it.
+        '''
+        held = self.heldWindows.pop(window, None)
+        if held:
+            self.redisplayList.update(held)
+            self.wakeTimer()
+
+    def dropWindow(self, window):
+        ''' dropWindow(window) - forget any widgets waiting for a window that is closing '''
+        self.heldWindows.pop(window, None)
+
+    def releaseHeld(self):
+        ''' releaseHeld - queue widgets from held windows that are no longer hidden '''
+        for window in list(self.heldWindows):
+            try:
+                if sip.isdeleted(window) or not self.windowHidden(window):
+                    self.redisplayList.update(self.heldWindows.pop(window))
+            except RuntimeError:
+                self.redisplayList.update(self.heldWindows.pop(window))
 
     def onTimer(self):
         '''
         onTimer - run items that need to be in the main thread.
         1) check for deleted C++ widget entries, and clean up
             the epics portion.
+        2) redisplay widgets, most important first, until the frame budget
+            is used up. Anything left over is redisplayed first on the next tick.
         Note that the global 'except's are intentional, as
         failures in the timer routine can otherwise cause things
         to break in unhealthy ways.
         '''
-        copyDisplay, self.redisplayList = self.redisplayList, []
-        for li in copyDisplay:
+        stats = self.redisplayStats
+        if len(self.heldWindows) > 0:
+            self.releaseHeld()
+        stats["queueDepth"] = len(self.redisplayList)
+        stats["maxQueueDepth"] = max(stats["maxQueueDepth"], stats["queueDepth"])
+        carried = False
+        if len(self.redisplayList) == 0:
+            self.scheduleTimer(carried)
+            return
+        copyDisplay, self.redisplayList = self.prioritize(self.redisplayList), {}
+        start = time.perf_counter()
+        deadline = start + self.frameBudget
+        for idx, li in enumerate(copyDisplay):
+            if idx > 0 and time.perf_counter() > deadline:
+                remaining = dict.fromkeys(copyDisplay[idx:])
+                remaining.update(self.redisplayList)
+                self.redisplayList = remaining
+                stats["carried"] += len(copyDisplay) - idx
+                carried = True
+                break
+            stats["redisplayed"] += 1
             if sip.isdeleted(li):
                 print('necessary cleanup of', li)
                 try:
@@ -150,11 +287,51 @@ class edmAppClass(debugClass):
             except:
                 print(f"redisplay failure for {li}")
                 traceback.print_exc()
+        stats["frames"] += 1
+        stats["frameTime"] = time.perf_counter() - start
+        stats["maxFrameTime"] = max(stats["maxFrameTime"], stats["frameTime"])
+        stats["held"] = sum( [ len(held) for held in self.heldWindows.values() ] )
+        if self.debug(2):
+            print(f"redisplay frame {stats}")
+        self.scheduleTimer(carried)
+
+    def prioritize(self, pending):
+        ''' prioritize(pending) - return the pending widgets as a list: widgets in the
+            active window first, then other visible widgets, then everything else.
+            Order is otherwise kept.
+            Widgets in hidden or minimized windows are moved to heldWindows, and
+            are queued again when the window is exposed. Widgets already hidden by
+            their visPv are dropped: the visPv update queues them again.
+        '''
+        active = QApplication.activeWindow()
+        first, second, rest = [], [], []
+        hidden = {}
+        for li in pending:
+            try:
+                if sip.isdeleted(li):
+                    rest.append(li)
+                    continue
+                window = li.window()
+                if window not in hidden:
+                    hidden[window] = self.windowHidden(window)
+                if hidden[window]:
+                    self.heldWindows.setdefault(window, {})[li] = None
+                elif li.isVisible():
+                    if active != None and window == active:
+                        first.append(li)
+                    else:
+                        second.append(li)
+                elif getattr(li, "visible", True) or getattr(li, "lastVisible", True):
+                    rest.append(li)
+            except (AttributeError, RuntimeError):
+                rest.append(li)
+        return first + second + rest
 
     # add a widget to a list to redisplay on a timer tick
     def redisplay(self, widget, **kw):
-        if widget not in self.redisplayList:
-            self.redisplayList.append(widget)
+        self.redisplayList[widget] = None
+        if not self.timerRunning or self.timerSlow:
+            self.wakeTimer()
 
     @staticmethod
     def edmScreen(*args,**kw):
@@ -15,8 +15,11 @@
 #   colorTable.colorIndex - list of colorRule Entries by name
 #   colorRule - name, numeric-id for a color
 #       colorRule.rulelist - rule mapping for determining color.
+#       colorRule.bounds, matches - rulelist compiled into intervals, searched with bisect.
 
 from os import getenv
+from bisect import bisect_left
+import math
 import re
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QColor
@@ -46,6 +49,7 @@ class oneRule:
             self.op = copy.op
             self.color =copy.color
             self.blinkColor = copy.blinkColor
+            self.blinking = (self.blinkColor != None)
             if copy.op == self.AND or copy.op == self.OR:
                 self.left = copy.left
                 self.right = copy.right
@@ -66,6 +70,26 @@ class oneRule:
         if self.op == self.OR:          return self.left.truthTest(value) or self.right.truthTest(value)
         return 0
 
+    def limits(self):
+        ''' limits - return the set of values this rule compares against, or
+            None if the test can't be described by a set of intervals
+        '''
+        if self.op in (self.NO_OP, self.DEFAULT):
+            return set()
+        if self.op in (self.AND, self.OR):
+            if self.left == None or self.right == None:
+                return None
+            left, right = self.left.limits(), self.right.limits()
+            if left == None or right == None:
+                return None
+            return left | right
+        if self.op in (self.LT, self.LE, self.GT, self.GE, self.EQ, self.NE):
+            try:
+                return { float(self.val) }
+            except (TypeError, ValueError):
+                return None
+        return None
+
     def printRule(self, indent=0):
         print("  "*indent, self.op, self.val)
         if self.left != None:
@@ -95,6 +119,8 @@ class colorRule:
         self.ruleList = []
         self.name = name
         self.numeric = numeric
+        self.bounds = None          # compiled interval table, see compile()
+        self.matches = None
 
     def __str__(self):
         return f"{self.numeric}: {self.name}"
@@ -117,27 +143,79 @@ class colorRule:
             self.ruleList.append( oneRule(copy) )
         else:
             self.ruleList.append( oneRule(*args, **kw))
+        self.bounds = None
         return self.ruleList[-1]
 
+    def compile(self):
+        ''' compile - build a sorted table of the values tested by the rules.
+            Between two adjacent values (and at each value) the result of every
+            test is fixed, so the first matching rule can be found in advance
+            for each of these intervals, and looked up with bisect.
+            bounds: sorted values b[0] .. b[n-1]
+            matches: 2n+1 entries; matches[2i] is the rule for values between
+                b[i-1] and b[i], and matches[2i+1] is the rule for b[i] exactly.
+            If a test can't be expressed as intervals, bounds is left empty and
+            matches is None, and getColor scans the rule list.
+        '''
+        limits = set()
+        for rule in self.ruleList:
+            ruleLimits = rule.limits()
+            if ruleLimits == None:
+                self.bounds, self.matches = [], None
+                return
+            limits |= ruleLimits
+        bounds = sorted(limits)
+        matches = [ self.scanRules(-math.inf) ]
+        for idx, value in enumerate(bounds):
+            matches.append(self.scanRules(value))
+            if idx+1 < len(bounds):
+                matches.append(self.scanRules((value + bounds[idx+1])/2.0))
+        matches.append(self.scanRules(math.inf))
+        self.bounds, self.matches = bounds, matches
+
+    def scanRules(self, value):
+        ''' scanRules - return the first rule that matches 'value', or None '''
+        for rule in self.ruleList:
+            if rule.truthTest(value):
+                return rule
+        return None
+
+    def findMatch(self, value):
+        ''' findMatch - use the compiled table to return the first rule that matches 'value' '''
+        if self.bounds == None:
+            self.compile()
+        if self.matches == None or value != value:      # not compiled, or NaN
+            return self.scanRules(value)
+        idx = bisect_left(self.bounds, value)
+        if idx < len(self.bounds) and self.bounds[idx] == value:
+            return self.matches[2*idx+1]
+        return self.matches[2*idx]
+
     def isRule(self):
         '''isRule - returns False if a static rule, True otherwise'''
         return self.ruleList[0].op != oneRule.DEFAULT
 
     # return the color for this rule
     def getColor( self, value=0.0, defColor=Qt.black):
+        return self.getColors(value, defColor)[0]
+
+    def getColors( self, value=0.0, defColor=Qt.black):
+        ''' getColors(value, defColor) - return (color, blinkColor) for this rule.
+            blinkColor is None if the color doesn't blink.
+        '''
         try:
             value = float(value)
         except:
             print(f"unable to convert {value} to float for {self.numeric} aka {self.name}")
-            return defColor
-        for rule in self.ruleList:
-            if rule.truthTest(value):
-                if rule.color == None:
-                    print(f"...using default color (none set). value={value} color name={self.name} index={self.numeric}")
-                    return defColor
-                return rule.color
+            return defColor, None
+        rule = self.findMatch(value)
+        if rule != None:
+            if rule.color == None:
+                print(f"...using default color (none set). value={value} color name={self.name} index={self.numeric}")
+                return defColor, None
+            return rule.color, rule.blinkColor
         print(f"...using default color (no match), value={value} color name={self.name} index={self.numeric}")
-        return defColor
+        return defColor, None
 
 class edmColor:
     '''edmColor - loads and manages an edm Color file.'''
@@ -288,6 +366,7 @@ class edmColor:
                     if self.debug > 0:
                         for rt in self.myRule.ruleList:
                             rt.printRule()
+                    self.myRule.compile()
                     continue
 
                 # hit the end of a block without knowing what's going on
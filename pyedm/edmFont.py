@@ -7,8 +7,18 @@
 #
 # EDM uses a "family-weight-italic-pointsize" naming scheme
 # convert this for use with QFontDatabase lookup
+#
+# Fonts are cached by (name, rescale), so each font is matched once, and all
+# widgets using a font share the same QFont. The QFontMetrics for each cached
+# font are kept with it; use getFontMetrics(font) rather than QFontMetrics(font).
+# warmFonts() resolves the fonts of a screen in one pass when it is read.
+# Font matching is reported to the "pyedm.edmFont" logger at DEBUG level.
+
+import logging
 
-from PyQt5.QtGui import QFontDatabase,QFont,QFontInfo
+from PyQt5.QtGui import QFontDatabase,QFont,QFontInfo,QFontMetrics
+
+logger = logging.getLogger(__name__)
 
 mapPointSize = [ 0,  1,  2,  3,  4,  5,  6,  6,  7,  8,
                  8,  9,  9, 11, 11, 12, 13, 14, 15, 15,
@@ -23,9 +33,13 @@ mapFontName = {
         }
 
 def GenericGetFont(fontName, rescale=1.0, squeeze=90.0):
+    ''' GenericGetFont(fontName, rescale) - return the shared QFont for an EDM font name,
+        or a JSON font description
+    '''
     if type(fontName) == str:
-        if fontName in edmFontTable:
-            return edmFontTable[fontName]
+        font = edmFontTable.get((fontName, rescale))
+        if font != None:
+            return font
         parts = fontName.split("-")
         if len(parts) < 4:
             raise ValueError(f"GenericGetFont bad font name {fontName}")
@@ -47,8 +61,9 @@ def GenericGetFont(fontName, rescale=1.0, squeeze=90.0):
         italic = fontName["italic"]
         pointsize = fontName["pointSize"]
         fontName = f"json:{fn}-{weight}-{italic}-{pointsize}"
-        if fontName in edmFontTable:
-            return edmFontTable[fontName]
+        font = edmFontTable.get((fontName, rescale))
+        if font != None:
+            return font
     else:
         raise ValueError(f"GenericGetFont illegal fontName type {type(fontName)} must be dict or str")
 
@@ -59,24 +74,43 @@ def GenericGetFont(fontName, rescale=1.0, squeeze=90.0):
     if pointsize > 11:
         font.setLetterSpacing(QFont.PercentageSpacing, squeeze)
 
-    fi = QFontInfo(font)
-    print(f"request {fontName}, use {fi.family()} {fi.weight()} {fi.italic()} {fi.pointSize()}")
+    if logger.isEnabledFor(logging.DEBUG):
+        fi = QFontInfo(font)
+        logger.debug(f"request {fontName} scale {rescale}, use {fi.family()} {fi.weight()} {fi.italic()} {fi.pointSize()}")
 
-    edmFontTable[fontName] = font
+    edmFontTable[(fontName, rescale)] = font
+    edmMetricsTable[id(font)] = QFontMetrics(font)
     return font
 
+def getFontMetrics(font):
+    ''' getFontMetrics(font) - QFontMetrics for 'font'. Cached for fonts from getFont() '''
+    metrics = edmMetricsTable.get(id(font))
+    if metrics == None:
+        metrics = QFontMetrics(font)
+    return metrics
+
+def warmFonts(fontNames, rescale=1.0):
+    ''' warmFonts(fontNames, rescale) - resolve a collection of font names ahead of use '''
+    count = len(edmFontTable)
+    for fontName in fontNames:
+        try:
+            getFont(fontName, rescale)
+        except ValueError as exc:
+            logger.warning(f"{exc}")
+    logger.debug(f"warmFonts: {len(edmFontTable)-count} new fonts, {len(edmFontTable)} cached")
+
 def X11GetFont(fontName, rescale=1.0):
     ''' X11GetFont - unused -preference is for a consistent compatible lookup
     '''
-    if fontName in edmFontTable:
-        return edmFontTable[fontName]
+    if (fontName, rescale) in edmFontTable:
+        return edmFontTable[(fontName, rescale)]
     parts = fontName.split("-")
     height = parts[3].split(".")
     height = height[0]
     rawName = str("-*-%1-%2-%3-*-*-%4-*-*-*-*-*-iso8859-*").arg(parts[0], parts[1], parts[2], height )
     font = QFont()
     font.setRawName(rawName)
-    edmFontTable[fontName] = font
+    edmFontTable[(fontName, rescale)] = font
     return font
 
 
@@ -105,4 +139,5 @@ import os
 #    getFont = GenericGetFont
     
 getFont = GenericGetFont
-edmFontTable = {}
+edmFontTable = {}           # (font name, rescale) -> QFont
+edmMetricsTable = {}        # id(QFont) -> QFontMetrics, for fonts in edmFontTable
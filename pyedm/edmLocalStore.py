@@ -0,0 +1,119 @@
+# Copyright 2023 Canadian Light Source, Inc. See The file COPYRIGHT in this distribution for further information.
+#
+# MODULE LEVEL: base
+#
+# This is a base level module: It must not call other pyedm modules
+#
+# Optional persistent storage for LOC PV values. Values are kept in an SQLite
+# database in WAL mode, so that local setpoints and selections survive a
+# restart. Writes are collected and flushed in a single transaction after a
+# short quiet period; reads are done one channel at a time, when the channel
+# is first referenced.
+#
+# Recommended use:
+#   edmLocalStore.openStore(filename)   - usually from the --restart flag
+#   edmLocalStore.store.restore(name)   - last saved value, or None
+#   edmLocalStore.store.save(name, value)
+#   edmLocalStore.closeStore()          - flushes outstanding writes
+
+import os
+import sqlite3
+import traceback
+
+from PyQt5.QtCore import QTimer, QCoreApplication
+
+class localStore:
+    ''' localStore - SQLite backing store for LOC channel values.
+        flushDelay - milliseconds without a write before pending values are written
+        maxPending - write immediately if this many values are waiting
+    '''
+    def __init__(self, filename, flushDelay=500, maxPending=500):
+        self.filename = filename
+        self.flushDelay = flushDelay
+        self.maxPending = maxPending
+        self.pending = {}
+        self.timer = None
+        dirname = os.path.dirname(filename)
+        if dirname != "" and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        self.db = sqlite3.connect(filename)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS loc (name TEXT PRIMARY KEY, value TEXT)")
+        self.db.commit()
+
+    def __repr__(self):
+        return f"<localStore {self.filename}>"
+
+    def restore(self, name):
+        ''' restore(name) - return the saved value of a channel, or None '''
+        if name in self.pending:
+            return self.pending[name]
+        try:
+            row = self.db.execute("SELECT value FROM loc WHERE name=?", (name,)).fetchone()
+        except sqlite3.Error as exc:
+            print(f"localStore: unable to restore {name}: {exc}")
+            return None
+        if row == None:
+            return None
+        return row[0]
+
+    def save(self, name, value):
+        ''' save(name, value) - queue a value to be written. Only the last
+            value written to a name before a flush is kept.
+        '''
+        self.pending[name] = str(value)
+        if len(self.pending) >= self.maxPending or QCoreApplication.instance() is None:
+            self.flush()
+            return
+        if self.timer == None:
+            self.timer = QTimer()
+            self.timer.setSingleShot(True)
+            self.timer.timeout.connect(self.flush)
+        self.timer.start(self.flushDelay)   # restarting the timer debounces bursts of writes
+
+    def flush(self):
+        ''' flush - write all pending values in one transaction '''
+        if self.timer != None:
+            self.timer.stop()
+        if len(self.pending) == 0:
+            return
+        pending, self.pending = self.pending, {}
+        try:
+            with self.db:
+                self.db.executemany("INSERT OR REPLACE INTO loc (name, value) VALUES (?,?)", pending.items())
+        except sqlite3.Error:
+            print(f"localStore: write failed for {self.filename}")
+            traceback.print_exc()
+
+    def close(self):
+        self.flush()
+        self.timer = None
+        self.db.close()
+
+def defaultStoreName():
+    return os.path.join(os.path.expanduser("~"), ".pyedm", "locstore.db")
+
+def openStore(filename=None, **kw):
+    ''' openStore(filename) - create the global store used by LOC PVs.
+        if filename is None, use the default location.
+    '''
+    global store
+    if store != None:
+        store.close()
+    if filename == None:
+        filename = defaultStoreName()
+    try:
+        store = localStore(filename, **kw)
+    except (sqlite3.Error, OSError) as exc:
+        print(f"Unable to open LOC PV store {filename}: {exc}")
+        store = None
+    return store
+
+def closeStore():
+    global store
+    if store != None:
+        store.close()
+        store = None
+
+store = None
@@ -8,12 +8,48 @@
 
 from pyedm.edmApp import edmApp
 import re
+import weakref
+
+# $(NAME) references. Splitting with a capturing group keeps the references
+# at the odd indexes of the result.
+macroPattern = re.compile(r"(\$\([^)]*\))")
+
+# compiled expansion templates, indexed by input string. A template is a
+# tuple of literal strings and macro names: names are at the odd indexes.
+templateCache = {}
+templateCacheMax = 4000
+# expanded results kept by each macroDictionary
+expandCacheMax = 4000
+
+def compileTemplate(input):
+    ''' compileTemplate(input) - return the cached template for 'input' '''
+    try:
+        return templateCache[input]
+    except KeyError:
+        pass
+    parts = macroPattern.split(input)
+    for idx in range(1, len(parts), 2):
+        parts[idx] = parts[idx][2:-1]
+    template = tuple(parts)
+    if len(templateCache) >= templateCacheMax:
+        templateCache.clear()
+    templateCache[input] = template
+    return template
 
 class macroDictionary:
     idno = 0
+    # count of lookups that failed, indexed by macro name. Only the first
+    # failure for a name is reported.
+    missCount = {}
     def __init__(self, parent=None):
         self.macroTable = {}
         self.parent = parent
+        self.children = weakref.WeakSet()
+        self.flatTable = None       # macroTable merged with all parents
+        self.expandCache = {}       # expanded results, until the next invalidate
+        self.dependents = {}        # macro name -> { widget : set of keys } (see addDependent)
+        if parent != None:
+            parent.children.add(self)
         macroDictionary.idno = macroDictionary.idno+1
         self.myid = macroDictionary.idno
 
@@ -23,6 +59,29 @@ class macroDictionary:
     def edmCleanup(self):
         pass
 
+    def invalidate(self):
+        ''' invalidate - discard cached lookups for this table and all tables
+            that inherit from it. Called whenever a macro changes.
+        '''
+        self.flatTable = None
+        self.expandCache = {}
+        for child in list(self.children):
+            child.invalidate()
+
+    def flatten(self):
+        ''' flatten - return a single dictionary with the value of every
+            macro visible from this table. Built on demand, and kept until
+            a macro changes here or in a parent.
+        '''
+        if self.flatTable == None:
+            if self.parent:
+                flat = dict(self.parent.flatten())
+                flat.update(self.macroTable)
+            else:
+                flat = dict(self.macroTable)
+            self.flatTable = flat
+        return self.flatTable
+
     # Call to explicitly add a "name" entry, which expands to "value"
     # Note that the test of 'name in value' means that its possible this
     # is a recursive definition. This can happen when building a macro table
@@ -30,11 +89,77 @@ class macroDictionary:
     # explicitly with MYMACRO=$(MYMACRO). By calling self.expand(), we
     # set the current value of MYMACRO.
     def addMacro(self, name, value=None):
-        name = name.lstrip()
-        if edmApp.debug(): print(self, "adding macro <%s> with value <%s>" % (name, value))
-        if value != None and name in value:       # possible recursion: try an early expansion
-            value = self.expand(value)
-        self.macroTable[name] = value
+        self.setMacros( [ (name, value) ] )
+
+    def setMacros(self, macroList):
+        ''' setMacros(macroList) - add or change a list of (name, value) pairs.
+            Widgets that depend on a changed macro are notified once, after
+            all the values have been set.
+        '''
+        changed = []
+        for name, value in macroList:
+            name = name.lstrip()
+            if edmApp.debug(): print(self, "adding macro <%s> with value <%s>" % (name, value))
+            if value != None and name in value:       # possible recursion: try an early expansion
+                value = self.expand(value)
+            if name in self.macroTable and self.macroTable[name] == value:
+                continue
+            inherited = self.flatten().get(name)
+            self.macroTable[name] = value
+            self.invalidate()
+            if value != inherited:
+                changed.append(name)
+        if changed:
+            self.notifyDependents(changed)
+
+    def macroNames(self, input, depth=0):
+        ''' macroNames(input) - return the set of macro names that the
+            expansion of 'input' uses, including names used by macro values.
+        '''
+        names = set()
+        flat = self.flatten()
+        for name in compileTemplate(input)[1::2]:
+            names.add(name)
+            value = flat.get(name)
+            if value != None and "$" in value and depth < 10:
+                names.update(self.macroNames(value, depth+1))
+        return names
+
+    def addDependent(self, input, widget, key):
+        ''' addDependent(input, widget, key) - record that 'widget' has
+            expanded 'input' for the purpose named by 'key'. When a macro used
+            by 'input' changes, widget.macroChanged(keys) is called with the
+            set of keys that may need updating.
+        '''
+        for name in self.macroNames(input):
+            self.dependents.setdefault(name, weakref.WeakKeyDictionary()).setdefault(widget, set()).add(key)
+
+    def removeDependent(self, widget):
+        for widgets in self.dependents.values():
+            widgets.pop(widget, None)
+
+    def findDependents(self, names, found):
+        ''' findDependents(names, found) - add the widgets of this table and
+            its children that depend on 'names' into the 'found' dictionary.
+            A child that defines its own value for a name hides the change.
+        '''
+        for name in names:
+            for widget, keys in list(self.dependents.get(name, {}).items()):
+                found.setdefault(widget, set()).update(keys)
+        for child in list(self.children):
+            childNames = [ name for name in names if name not in child.macroTable ]
+            if childNames:
+                child.findDependents(childNames, found)
+        return found
+
+    def notifyDependents(self, names):
+        for widget, keys in self.findDependents(names, {}).items():
+            try:
+                widget.macroChanged(keys)
+            except RuntimeError:
+                pass    # most likely the Qt widget has been deleted
+            except AttributeError as exc:
+                print(f"macro change: unable to update {widget}: {exc}")
 
     # Call with possible comma separated list of macros, with '=' separating
     # macro names from values
@@ -54,18 +179,22 @@ class macroDictionary:
 
     def findValue(self, macName):
         if edmApp.debug() : print(self, "looking for", macName)
-        if macName in self.macroTable:
-            if edmApp.debug(): print("  ... found", self.macroTable[macName])
-            return self.macroTable[macName]
-        if self.parent:
-            value = self.parent.findValue(macName)
-            if value != None:
-                return value
-        if edmApp.debug(): print(" ... not found")
-        # informative warning, not an error
-        print("Macro", macName, "not found in table", self)
+        flat = self.flatten()
+        if macName in flat:
+            if edmApp.debug(): print("  ... found", flat[macName])
+            return flat[macName]
+        self.notFound(macName)
         return None
 
+    def notFound(self, macName):
+        ''' notFound - count a failed lookup. The first failure of a name is
+            reported as an informative warning, not an error.
+        '''
+        count = self.missCount.get(macName, 0)
+        self.missCount[macName] = count + 1
+        if count == 0 or edmApp.debug():
+            print("Macro", macName, "not found in table", self)
+
     def expand( self, input, depth=0):
         '''expand(input, depth=0) : perform a keyword substitution -
             looks for $(NAME) in input, and replaces it with
@@ -73,20 +202,37 @@ class macroDictionary:
             the value from the closest parent.
             if NAME is not found, the string remains unchanged.
             Macro loops should be prevented by use of 'depth'.
+            Results are cached until a macro in this table or a parent changes.
         '''
-        success = False
-        source = re.split("(\$\([^)]*\))", input)
-        result = ""
-        for part in source:
-            if part[0:2] == "$(" and part[-1] == ")":
-                value = self.findValue(part[2:-1])
+        if depth == 0:
+            try:
+                return self.expandCache[input]
+            except KeyError:
+                pass
+        template = compileTemplate(input)
+        if len(template) == 1:
+            result = template[0]
+        else:
+            flat = self.flatten()
+            success = False
+            parts = list(template)
+            for idx in range(1, len(parts), 2):
+                name = parts[idx]
+                value = flat.get(name)
                 if value != None:
-                    result = result + value
+                    parts[idx] = value
                     success = True
-                    continue
-            result = result + part
-        if success and depth < 10 and "$" in result and input != result:
-            return self.expand(result, depth+1)
+                else:
+                    if name not in flat:
+                        self.notFound(name)
+                    parts[idx] = "$(" + name + ")"
+            result = "".join(parts)
+            if success and depth < 10 and "$" in result and input != result:
+                result = self.expand(result, depth+1)
+        if depth == 0:
+            if len(self.expandCache) >= expandCacheMax:
+                self.expandCache.clear()
+            self.expandCache[input] = result
         return result
 
     # create a new table that is a child of this table.
@@ -9,6 +9,7 @@ import sys
 import signal
 import os
 import argparse
+import logging
 import glob
 
 from PyQt5 import QtWidgets
@@ -19,10 +20,14 @@ from .edmWindowWidget import generateWindow, generateWidget, edmWindowWidget
 from .edmScreen import edmScreen
 from .edmMacro import macroDictionary
 from .edmColors import findColorRule, colorTable
+from . import edmLocalStore
+from . import edmPlotData
 
 def sigint_handler(*args):
     for window in edmApp.windowList:
         window.edmCleanup()
+    edmLocalStore.closeStore()
+    edmPlotData.closeHistoryFiles()
     QtWidgets.QApplication.quit()
 
 # Mainline
@@ -43,6 +48,8 @@ def pyedm_main(argv):
         exit()
 
     app.exec_()
+    edmLocalStore.closeStore()
+    edmPlotData.closeHistoryFiles()
 
 class remapAction(argparse.Action):
     def __init__(self, *args, **kw):
@@ -73,13 +80,16 @@ def pyedm(argv):
     parser.add_argument( "-noedit", action="count",  default=0, help="Remove capability to put display in edit mode, used with  -x to produce execute only operation" )
     parser.add_argument( "--autosize", action="count", default=0, help="expand text widgets to avoid clipping characters" )
     parser.add_argument( "--scale", type=float, default=1.0, help="scale offsets and sizes" )
+    parser.add_argument( "--flatten", action="count", default=0, help="draw rectangles, lines, circles and arcs as part of their window, instead of as separate widgets" )
     parser.add_argument( "--delimiter", action="store",  default=';', help="change the delimter character used by environment variables" )
+    parser.add_argument( "--restart", action="count", default=0, help="save LOC PV values, and restore them from the last session")
+    parser.add_argument( "--plothistory", default=None, metavar="DIR", help="keep the history of rolling XY time plots in DIR, and reload it on rebuild and restart")
+    parser.add_argument( "--locstore", default=None, metavar="STOREFILE", help=f"file used by --restart to keep LOC PV values (default {edmLocalStore.defaultStoreName()})")
 # following items are not implemented - either low priority or not applicable
     parser.add_argument( "--execute", "-x", action="count", help="(not implemented) Open all displays in execute rather than edit mode" )
     parser.add_argument( "--ctl", nargs=1, help="(not implemented)Takes name of string process variable, writing a display file name to this string causes edm to open the display in execute mode")
     parser.add_argument( "--color", help="(not implemented) Set Colormode - index (default) or rgb")
     parser.add_argument( "--cmap", action="count", help="(not implemented) use private colormap if necessary")
-    parser.add_argument( "--restart", action="count", help="(not implemented) Takes PID number, restart from last shutdown")
     parser.add_argument( "--convert", action="count", help="(not implemented) Convert input file to new versin and exit")
     parser.add_argument( "--server", action="count", help="(not implemented) Communicate with or become a display file server which can manage multiple displays")
     parser.add_argument( "--port", nargs=1, help="(not implemented) Use specified TCP/IP port number (default=19000)")
@@ -99,17 +109,23 @@ def pyedm(argv):
             1. check for debugging
             2. determine delimiter
             3. set edmApp paths
-            4. read color table
+            4. read color table, open LOC PV store
             5. import modules
             6. interpret remaining flags
             7. read command line files
     '''
     edmApp.DebugFlag = results.debug
+    logging.basicConfig(format="%(name)s: %(message)s")
+    logging.getLogger("pyedm").setLevel(logging.DEBUG if results.debug else logging.WARNING)
     edmApp.delimiter = results.delimiter
     edmApp.rescale = results.scale
 
     edmApp.setPath()
     colorTable.loadColor()
+    if results.restart or results.locstore:
+        edmLocalStore.openStore(results.locstore)
+    if results.plothistory:
+        edmPlotData.setHistoryDir(results.plothistory)
     loadModules()
     for macro in results.macro:
         mt.macroDecode(macro)
@@ -117,6 +133,7 @@ def pyedm(argv):
     edmApp.macroTable = mt
     edmApp.remap = results.remap
     edmApp.autosize = results.autosize
+    edmApp.flattenShapes = results.flatten > 0
 
     if results.noedit:
         edmApp.allowEdit = False
@@ -129,8 +146,10 @@ def pyedm(argv):
     # All the file arguments have been read. Generate the screens.
     #
 
+    # each window has its own table, so that macros set from a window (see
+    # menuMuxClass) only apply to it and the displays opened from it.
     for scr in edmApp.screenList :
-        window = generateWindow(scr,macroTable=mt)
+        window = generateWindow(scr,macroTable=mt.newTable())
         edmApp.windowList.append(window)
 
     if results.new:
@@ -3,21 +3,43 @@
 # MODULE LEVEL: low
 #
 # Support for LOC pv types
+#
+# Local PVs are frequently used as scratch storage by screens, so writes are
+# kept cheap: the converter for a channel is bound once when the type is known,
+# decoded names are cached, and notifications are coalesced. A write stores
+# the new value in the channel and its PVs, so pv.value is current as soon as
+# put() returns, and marks the channel pending; the callbacks of connected PVs
+# run once per event-loop turn with the latest value (the same
+# latest-value-wins behaviour seen on EPICS monitors).
+# If edmLocalStore has an open store, values are restored when a channel is
+# first referenced, and saved on every write.
 from builtins import str
 import re
+
+from PyQt5.QtCore import QTimer, QCoreApplication
+
 from pyedm.edmPVfactory import edmPVbase, pvClassDict
 from pyedm.edmApp import edmApp
+from pyedm import edmLocalStore
 
 chanDict = {}
+# cache of pvDecode() results, indexed by the full LOC name
+decodeCache = {}
+# channels with a value change that hasn't been delivered yet
+pendingChannels = {}
+flushScheduled = False
 
 def enumConverter(value, enums):
     if isinstance(value, int) or isinstance(value, float):
         val = int(value)
-        if val >= 0 or val <= len(enums):
+        if val >= 0 and val < len(enums):
             return (val, enums[val])
         return (val, str(val))
     if isinstance(value, str):
-        return( enums.index(value), value)
+        if value in enums:
+            return( enums.index(value), value)
+        # an index, as saved by edmLocalStore
+        return enumConverter(int(float(value)), enums)
     return (0, "")
 
 def intConverter(value, enums):
@@ -27,6 +49,40 @@ def intConverter(value, enums):
         val = int(value)
     return val, str(value)
 
+def floatConverter(value, enums):
+    return float(value), str(value)
+
+def stringConverter(value, enums):
+    value = str(value)
+    return value, value
+
+def flushChannels():
+    ''' flushChannels - deliver pending channel updates. Each channel
+        notifies its PVs once, using the most recent value written.
+        Writes made from within a callback are delivered on the next turn.
+    '''
+    global flushScheduled
+    flushScheduled = False
+    chans = list(pendingChannels)
+    pendingChannels.clear()
+    for chan in chans:
+        chan.notify()
+
+def scheduleFlush(chan):
+    ''' scheduleFlush(chan) - queue a channel for notification at the end
+        of this event-loop turn. Without a running Qt application, deliver
+        immediately.
+    '''
+    global flushScheduled
+    pendingChannels[chan] = None
+    if flushScheduled:
+        return
+    if QCoreApplication.instance() is None:
+        flushChannels()
+        return
+    flushScheduled = True
+    QTimer.singleShot(0, flushChannels)
+
 class channel:
     # these types match the general types from edmPVbase
     types = { "i":edmPVbase.typeInt,
@@ -36,14 +92,16 @@ class channel:
               "U":edmPVbase.typeUnknown}
 
     converter = { edmPVbase.typeInt : intConverter,
-                  edmPVbase.typeFloat : lambda v,e:(float(v), str(v)),
-                  edmPVbase.typeString: lambda v,e:(str(v), str(v)),
+                  edmPVbase.typeFloat : floatConverter,
+                  edmPVbase.typeString: stringConverter,
                   edmPVbase.typeEnum: enumConverter,
-                  edmPVbase.typeUnknown: lambda v,e:(str(v), str(v))
+                  edmPVbase.typeUnknown: stringConverter
                   }
 
     pvPattern = re.compile("(=[ides]:)|(:[ieds]=)|([:=][ieds]$)")
 
+    __slots__ = ( "connectList", "enums", "name", "pvType", "convert", "value", "char_value" )
+
     def __init__(self, name, pv=None, chType=None, chVal=None):
         self.connectList = []
         self.enums = []
@@ -54,27 +112,47 @@ class channel:
             self.initType(chType, chVal)
         self.addPV(pv)
 
+    def __repr__(self):
+        return f"<LOC channel {self.name}>"
+
     @staticmethod
     def pvDecode(pvName):
+        ''' pvDecode(pvName) - return (name, type, initial value) for a LOC
+            name. Results are cached, as the same names are decoded for every
+            widget that references the channel.
+        '''
+        try:
+            return decodeCache[pvName]
+        except KeyError:
+            pass
         decode = channel.pvPattern.split(pvName)
         if len(decode) == 1:
-            return [pvName, "U", None]
-        pvType = [val for val in decode[1:-1] if val != None ][0][1]
-        if pvType not in channel.types:
-            pvType = "U"
-        edmApp.debug(mesg=f"LOC\pvDecode type={pvType} {decode}")
-        if decode[4] == '':
-            return [decode[0], pvType, None]
-        return [decode[0], pvType, decode[4]]
+            words = (pvName, "U", None)
+        else:
+            pvType = [val for val in decode[1:-1] if val != None ][0][1]
+            if pvType not in channel.types:
+                pvType = "U"
+            edmApp.debug(mesg=f"LOC\\pvDecode type={pvType} {decode}")
+            if decode[4] == '':
+                words = (decode[0], pvType, None)
+            else:
+                words = (decode[0], pvType, decode[4])
+        decodeCache[pvName] = words
+        return words
+
+    def setType(self, pvType):
+        self.pvType = pvType
+        self.convert = self.converter[pvType]
 
     def initType(self, pvType, value):
-        self.pvType = self.types[pvType]
+        self.setType(self.types[pvType])
         if value == None: value = ""
         if self.pvType == edmPVbase.typeEnum:
-            value, self.enums = value.split(",",1)
+            value, enums = value.split(",",1)
+            self.enums = enums.split(",")
             value = int(value)
         try:
-            self.value, self.char_value = self.converter[self.pvType](value, self.enums)
+            self.value, self.char_value = self.convert(value, self.enums)
         except:
             print("Local PV initialization failed:", self.name, value)
             self.value = 0
@@ -90,12 +168,12 @@ class channel:
             # if channel type specified,
             if self.types[chanType] != self.pvType:
                 if self.pvType == edmPVbase.typeUnknown:
-                    self.pvType = self.types[chanType]
+                    self.setType(self.types[chanType])
                 elif self.types[chanType] != edmPVbase.typeUnknown:
                     print("Type conflict for PV", self.name, self.types[chanType], self.pvType)
 
         if initVal != None:
-            self.value, self.char_value = self.converter[self.pvType](value, self.enums)
+            self.value, self.char_value = self.convert(initVal, self.enums)
 
     def delPV(self, pv):
         self.connectList.remove(pv)
@@ -103,37 +181,58 @@ class channel:
     def setValue(self, value):
         if edmApp.debug(): print('setValue(', self, value, ')')
         try:
-            self.value, self.char_value = self.converter[self.pvType](value, self.enums)
+            self.value, self.char_value = self.convert(value, self.enums)
         except:
             print("ERROR: setValue() failure for", self.name, value, type(value))
             return
+        if edmLocalStore.store != None:
+            edmLocalStore.store.save(self.name, self.value)
+        self.updatePVs()
+        scheduleFlush(self)
+
+    def restoreValue(self):
+        ''' restoreValue - if there is a persistent store, replace the value
+            with the one saved from a previous session.
+        '''
+        if edmLocalStore.store == None:
+            return
+        value = edmLocalStore.store.restore(self.name)
+        if value == None:
+            return
+        try:
+            self.value, self.char_value = self.convert(value, self.enums)
+        except:
+            print("Local PV restore failed:", self.name, value)
 
+    def updatePVs(self):
+        ''' updatePVs - copy the current value to all connected PVs '''
         for ePV in self.connectList:
             ePV.value = self.value
             ePV.char_value = self.char_value
+
+    def notify(self):
+        ''' notify - pass the current value to all connected PVs and their callbacks'''
+        self.updatePVs()
+        value, char_value = self.value, self.char_value
+        for ePV in self.connectList:
             if ePV.debug(): print("callback LOCAL", self.name, "value=", value)
             for fn in ePV.callbackList:
-                    fn[0](fn[1], pvname=self.name, chid=0,pv=ePV,value=self.value,count=1,units=ePV.units,severity=0,userArgs=fn[2])
+                    fn[0](fn[1], pvname=self.name, chid=0,pv=ePV,value=value,count=1,units=ePV.units,severity=0,userArgs=fn[2])
 
 # create a new channel, and connect this PV to it.
 def findChannel(name, init=0, pv=None):
     words = channel.pvDecode(name)
     if words[0] in chanDict:
         ch = chanDict[words[0]]
-        if len(words) > 1:
-            ch.addPV(pv, words[1])
-        else:
-            ch.addPV(pv)
+        ch.addPV(pv, words[1])
         return ch
 
     if init == 0 or pv == None:
         return None
 
-    if len(words) > 1:
-        newchan = channel(words[0], chType=words[1],chVal=words[2], pv=pv)
-    else:
-        newchan = channel(words[0], pv=pv)
-
+    newchan = channel(words[0], chType=words[1],chVal=words[2])
+    newchan.restoreValue()
+    newchan.addPV(pv)
     chanDict[words[0]] = newchan
     return newchan
 
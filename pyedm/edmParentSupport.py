@@ -4,6 +4,7 @@
 #
 # Provides common tools for items that contain sub-items
 #
+import os
 from enum import Enum
 
 from PyQt5 import QtGui, QtCore, QtWidgets
@@ -37,6 +38,197 @@ class edmParentSupport:
         self.focusedWidget = None       # if hovering over a widget, check that we're still over the same widget.
         self.buttonInterest = []
         self.edmEditList = []
+        self.flatChildren = {}          # insertion-ordered set of children drawn by paintFlatChildren
+        self.staticChildren = []        # hidden children drawn from staticLayer
+        self.staticLayer = None         # QPixmap of staticChildren, or None to re-render
+        self.staticReleased = False     # static layer released for editing (see editMode)
+
+    # containers that call paintFlatChildren from their paintEvent set this to True
+    flatParent = False
+
+    def addFlatChild(self, child):
+        ''' addFlatChild(child) - draw 'child' from this widget's paintEvent, instead of
+            as a separate widget. Children are drawn in the order they are added.
+        '''
+        self.flatChildren[child] = None
+        self.update(child.geometry())
+
+    def removeFlatChild(self, child):
+        if child in self.flatChildren:
+            del self.flatChildren[child]
+            self.update(child.geometry())
+
+    def checkFlatChildren(self):
+        ''' checkFlatChildren - flattened children are drawn below every child widget. Go back to
+            drawing a flattened child as a widget if a child widget before it in the stacking
+            order overlaps it, so that it is still drawn on top, as EDM does. Called once the
+            children have been built.
+        '''
+        below = []
+        for child in self.children():
+            if not isinstance(child, edmWidget):
+                continue
+            geom = child.geometry()
+            if getattr(child, "flattened", False):
+                if not any(geom.intersects(other) for other in below):
+                    continue
+                child.unflatten()
+            below.append(geom)
+
+    def paintFlatChildren(self, event):
+        ''' paintFlatChildren(event) - draw the static layer, and then the flattened
+            children that overlap the region being repainted, with a single painter.
+        '''
+        if len(self.flatChildren) == 0 and len(self.staticChildren) == 0:
+            return
+        region = event.region()
+        painter = QtGui.QPainter(self)
+        if len(self.staticChildren) > 0:
+            if self.staticLayer == None:
+                self.renderStaticLayer()
+            painter.drawPixmap(self.staticOrigin, self.staticLayer)
+        for child in list(self.flatChildren):
+            try:
+                if not child.visible:
+                    continue
+                geom = child.geometry()
+                if not region.intersects(geom):
+                    continue
+                painter.save()
+                painter.translate(geom.topLeft())
+                painter.setClipRect(0, 0, geom.width(), geom.height())
+                child.drawShape(painter)
+                painter.restore()
+            except RuntimeError:        # child deleted
+                self.flatChildren.pop(child, None)
+        painter.end()
+
+    def usePixmap(self):
+        ''' usePixmap - True if the screen's usePixmap property, or the EDMUSEPIXMAP
+            environment variable when the property is "By env var", asks for a static layer.
+        '''
+        try:
+            mode = self.getProperty("usePixmap").value
+        except AttributeError:
+            return False
+        if mode == 0:
+            return os.environ.get("EDMUSEPIXMAP", "") not in ("", "0", "no", "false")
+        return mode == 2
+
+    def buildStaticLayer(self):
+        ''' buildStaticLayer - hide the children that can never change (see
+            edmWidget.isStatic), and draw them from a single pixmap instead.
+            A static child stays live if a dynamic child below it overlaps it, so
+            that the stacking order is not changed. Groups build their own layer.
+        '''
+        self.releaseStaticLayer()
+        dynamic = []
+        for child in self.children():
+            if not isinstance(child, edmWidget):
+                continue
+            if getattr(child, "flatParent", False):
+                child.buildStaticLayer()
+            flattened = getattr(child, "flattened", False)
+            if child.isHidden() and not flattened:
+                continue
+            geom = child.geometry()
+            if not child.isStatic() or any(geom.intersects(other) for other in dynamic):
+                dynamic.append(geom)
+                continue
+            self.staticChildren.append(child)
+        if len(self.staticChildren) == 0:
+            return
+        if edmApp.debug(): print(f"{self} static layer: {len(self.staticChildren)} widgets")
+        for child in self.staticChildren:
+            child.inStaticLayer = True
+            if getattr(child, "flattened", False):
+                self.flatChildren.pop(child, None)
+            else:
+                child.hide()
+        self.update()
+
+    def renderStaticLayer(self):
+        ''' renderStaticLayer - draw the static children into staticLayer '''
+        bounds = QtCore.QRect()
+        for child in self.staticChildren:
+            bounds = bounds.united(child.geometry())
+        ratio = self.devicePixelRatioF()
+        pixmap = QtGui.QPixmap(bounds.size() * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        painter = QtGui.QPainter(pixmap)
+        painter.translate(-bounds.topLeft())
+        for child in self.staticChildren:
+            geom = child.geometry()
+            if getattr(child, "flattened", False):
+                painter.save()
+                painter.translate(geom.topLeft())
+                painter.setClipRect(0, 0, geom.width(), geom.height())
+                child.drawShape(painter)
+                painter.restore()
+            else:
+                # render() fills the background unless asked not to; only do so if the widget would
+                flags = QtWidgets.QWidget.DrawChildren
+                if child.autoFillBackground():
+                    flags |= QtWidgets.QWidget.DrawWindowBackground
+                child.render(painter, geom.topLeft(), QtGui.QRegion(), flags)
+        painter.end()
+        self.staticOrigin = bounds.topLeft()
+        self.staticLayer = pixmap
+
+    def invalidateStaticLayer(self):
+        ''' invalidateStaticLayer - re-render the static layer on the next paint '''
+        if self.staticLayer != None:
+            self.staticLayer = None
+            self.update()
+
+    def topParent(self):
+        ''' topParent - the top level window holding this widget '''
+        top = self
+        while isinstance(getattr(top, "edmParent", None), edmParentSupport):
+            top = top.edmParent
+        return top
+
+    def editing(self):
+        ''' editing - True while this widget or one of its groups is in an edit mode,
+            has an edit window open, or is moving a widget
+        '''
+        if self.editModeValue != editModeEnum.none or len(self.edmEditList) > 0:
+            return True
+        if self.rubberband != None and self.rubberband.active():
+            return True
+        return any(child.editing() for child in self.children()
+                    if getattr(child, "flatParent", False) and isinstance(child, edmParentSupport))
+
+    def restoreStaticLayer(self):
+        ''' restoreStaticLayer - rebuild the static layer of the top level window,
+            if it was released for editing and no edit is still in progress.
+        '''
+        top = self.topParent()
+        if not top.staticReleased or top.editing():
+            return
+        top.staticReleased = False
+        if top.usePixmap():
+            top.buildStaticLayer()
+
+    def releaseStaticLayer(self):
+        ''' releaseStaticLayer - make the static children live widgets again,
+            here and in any groups. Used before editing.
+        '''
+        for child in self.children():
+            if getattr(child, "flatParent", False) and isinstance(child, edmParentSupport):
+                child.releaseStaticLayer()
+        if len(self.staticChildren) == 0:
+            return
+        staticChildren, self.staticChildren = self.staticChildren, []
+        self.staticLayer = None
+        for child in staticChildren:
+            child.inStaticLayer = False
+            if getattr(child, "flattened", False):
+                self.addFlatChild(child)
+            else:
+                child.show()
+        self.update()
 
     def edmCleanup(self):
         # To Do: add check for unsaved changes
@@ -50,6 +242,9 @@ class edmParentSupport:
         self.focusedWidget = None
         self.buttonInterest.clear()
         self.edmEditList.clear()
+        self.flatChildren.clear()
+        self.staticChildren.clear()
+        self.staticLayer = None
 
         for child in self.children():
             try:
@@ -68,8 +263,13 @@ class edmParentSupport:
         if edmApp.debug(): print(f"edmParentSupport editMode {self} {check} {value}")
         if value != None:
             self.editModeValue = editModeEnum[value]
+            if value != "none":
+                top = self.topParent()
+                top.releaseStaticLayer()
+                top.staticReleased = True
             if value == "none":
                 self.selectedWidget = None
+                self.restoreStaticLayer()
         return self.editModeValue == editModeEnum[check]
 
     def edmShowEdit(self, thisWidget):
@@ -90,6 +290,7 @@ class edmParentSupport:
         if edmEditWindow in self.edmEditList:
             edmEditWindow.showEditWindow = None
             self.edmEditList.remove(edmEditWindow)
+            self.restoreStaticLayer()
 
     def edmCutChild(self, child):
         ''' edmCutChild - remove the widget from any references, and call edmCleanup on the widget.
@@ -197,7 +398,7 @@ class windowMenu(QtWidgets.QMenu):
             scr = edmScreen(filename, mt)
             if scr.valid():
                 edmApp.screenList.append(scr)
-                window = edmApp.generateWindow(scr,macroTable=mt)
+                window = edmApp.generateWindow(scr,macroTable=mt.newTable())
                 edmApp.windowList.append(window)
         except BaseException as exc:
             print(f"Unable to open file {filename}\n     because {exc}")
@@ -0,0 +1,479 @@
+# Copyright 2023 Canadian Light Source, Inc. See The file COPYRIGHT in this distribution for further information.
+#
+# MODULE LEVEL: base
+#
+# This is a base level module: It must not call other pyedm modules
+#
+# Storage for plot data. A ringBuffer holds the last 'maxlen' values of a
+# curve in a preallocated NumPy array. Every value is written twice, at
+# its position and at position+maxlen, so that the most recent values are
+# always available as a contiguous slice: view() never copies, and can be
+# handed directly to pyqtgraph.
+#
+# A ringView reads the most recent values of a ringBuffer that may be
+# longer, so that curves of different lengths can share one buffer. An
+# indexView gives the matching sample numbers 0, 1, 2... for plots that
+# are not against time.
+#
+# A minMaxEnvelope reduces a curve with a rising x value to the lowest and
+# highest point in each x bin, so that a long history can be drawn with a
+# few points per pixel without losing peaks. Bins are aligned to multiples
+# of the bin width, so when samples are appended only the last bin and the
+# new ones need to be computed, and when the oldest samples are dropped only
+# the first bin.
+#
+# A historyStore keeps a curve's history beyond the length of its ringBuffer,
+# in tiers of buckets. Each bucket in the first tier summarizes 'factor'
+# samples by their minimum, maximum and mean; each bucket in the next tier
+# summarizes 'factor' buckets of the tier below, and so on. Every tier has a
+# fixed number of buckets, so memory is bounded while the span covered grows
+# by 'factor' with each tier.
+#
+# A historyFile keeps the samples of a curve in a memory-mapped .npy file,
+# used as a ring of rows of (x, y), so that a rolling plot can start again
+# where it left off after a rebuild or a restart. Files are only used when
+# historyDir has been set (from the --plothistory flag), and are named from
+# the PV. If several curves plot the same PV, the first one writes the file.
+#
+
+import os
+from urllib.parse import quote
+import numpy as np
+
+class ringBuffer:
+    ''' ringBuffer - fixed length history of values, oldest first '''
+    def __init__(self, maxlen, dtype=np.float64):
+        self.maxlen = max(int(maxlen), 1)
+        self.data = np.zeros(2*self.maxlen, dtype=dtype)
+        self.head = 0       # position of the next value, 0 <= head < maxlen
+        self.count = 0
+        self.total = 0      # number of values ever added: view()[0] is value number total-count
+        self.generation = 0 # changed when stored values are discarded other than by age
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, idx):
+        return self.view()[idx]
+
+    def __repr__(self):
+        return f"ringBuffer({self.count}/{self.maxlen})"
+
+    def view(self):
+        ''' view - contiguous array of the stored values. This is not a copy,
+            so it will change as values are added.
+        '''
+        start = self.head - self.count
+        if start < 0:
+            start += self.maxlen
+        return self.data[start:start+self.count]
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+        self.generation += 1
+
+    def append(self, value):
+        head = self.head
+        self.data[head] = value
+        self.data[head+self.maxlen] = value
+        head += 1
+        self.head = 0 if head == self.maxlen else head
+        if self.count < self.maxlen:
+            self.count += 1
+        self.total += 1
+
+    def popleft(self):
+        ''' popleft - drop the oldest value '''
+        if self.count == 0:
+            raise IndexError("popleft from an empty ringBuffer")
+        value = self.view()[0]
+        self.count -= 1
+        self.generation += 1
+        return value
+
+    def extend(self, values):
+        ''' extend - add an array of values, in at most two vectorized copies '''
+        values = np.asarray(values, dtype=self.data.dtype).ravel()
+        num = len(values)
+        if num == 0:
+            return
+        self.total += num
+        if num >= self.maxlen:
+            values = values[-self.maxlen:]
+            num = self.maxlen
+        maxlen = self.maxlen
+        head = self.head
+        first = min(num, maxlen-head)
+        self.data[head:head+first] = values[:first]
+        self.data[head+maxlen:head+maxlen+first] = values[:first]
+        if first < num:
+            rest = num - first
+            self.data[0:rest] = values[first:]
+            self.data[maxlen:maxlen+rest] = values[first:]
+        self.head = (head + num) % maxlen
+        self.count = min(self.count + num, maxlen)
+
+    def replace(self, values):
+        ''' replace - discard the stored values, and store 'values' '''
+        self.clear()
+        self.extend(values)
+
+    def resize(self, maxlen):
+        ''' resize - change the length of the history, keeping the most recent values '''
+        maxlen = max(int(maxlen), 1)
+        if maxlen == self.maxlen:
+            return
+        values = self.view().copy()
+        self.maxlen = maxlen
+        self.data = np.zeros(2*maxlen, dtype=self.data.dtype)
+        self.clear()
+        self.extend(values)
+
+class ringView:
+    ''' ringView - the last 'maxlen' values of a ringBuffer, read in the same way as a ringBuffer '''
+    def __init__(self, buf, maxlen):
+        self.buf = buf
+        self.maxlen = maxlen
+
+    def __len__(self):
+        return min(len(self.buf), self.maxlen)
+
+    def __getitem__(self, idx):
+        return self.view()[idx]
+
+    def __repr__(self):
+        return f"ringView({len(self)}/{self.maxlen} of {self.buf})"
+
+    @property
+    def total(self):
+        return self.buf.total
+
+    @property
+    def generation(self):
+        return self.buf.generation
+
+    def view(self):
+        values = self.buf.view()
+        return values[len(values)-len(self):]
+
+class indexView(ringView):
+    ''' indexView - the sample numbers 0, 1, 2... of the values of a ringView '''
+    @property
+    def generation(self):
+        # once full, every new value renumbers the others
+        return (self.buf.generation, self.buf.total if len(self) == self.maxlen else 0)
+
+    def view(self):
+        return indexArray(len(self))
+
+def indexArray(length):
+    ''' indexArray - a shared, read-only array of 0 to length-1 '''
+    values = indexArrays.get(length)
+    if values is None:
+        if len(indexArrays) >= 64:
+            indexArrays.clear()
+        values = np.arange(length, dtype=np.float64)
+        values.setflags(write=False)
+        indexArrays[length] = values
+    return values
+
+indexArrays = {}    # length : array
+
+def minMaxBins(x, y, binWidth, first=0):
+    ''' minMaxBins - split x,y into bins of binWidth, and find the lowest and highest point of each.
+        Returns the bin numbers, the sample number of the start of each bin (counting from 'first'),
+        and the x and y of the two points in each bin, in x order. Returns None if x falls.
+    '''
+    ids = np.floor(x / binWidth).astype(np.int64)
+    step = ids[1:] != ids[:-1]
+    if np.any(ids[1:] < ids[:-1]):
+        return None
+    starts = np.concatenate(([0], np.flatnonzero(step)+1))
+    ends = np.append(starts[1:], len(ids))
+    group = np.repeat(np.arange(len(starts)), ends - starts)
+    order = np.lexsort((y, group))     # by bin, then by y
+    low, high = order[starts], order[ends-1]
+    left, right = np.minimum(low, high), np.maximum(low, high)
+    px = np.stack((x[left], x[right]), axis=1)
+    py = np.stack((y[left], y[right]), axis=1)
+    return ids[starts], starts+first, px, py
+
+class minMaxEnvelope:
+    ''' minMaxEnvelope - min/max decimation of an x,y pair of ringBuffers '''
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.binWidth = None
+        self.source = None      # the ringBuffers, and their generations, the bins were computed from
+        self.oldest = 0         # sample number of the first value in the buffers
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.starts = np.zeros(0, dtype=np.int64)
+        self.px = np.zeros((0,2))
+        self.py = np.zeros((0,2))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def update(self, xbuf, ybuf, binWidth):
+        ''' update - bring the bins up to date with the buffers. Returns False if x is not
+            rising, in which case the curve can not be decimated.
+        '''
+        x, y = xbuf.view(), ybuf.view()
+        oldest = ybuf.total - len(y)
+        self.oldest = oldest
+        source = (xbuf, ybuf, xbuf.generation, ybuf.generation, xbuf.total - ybuf.total)
+        if binWidth != self.binWidth or source != self.source or len(self.ids) == 0 or self.starts[-1] < oldest:
+            self.reset()
+            self.oldest = oldest
+            bins = minMaxBins(x, y, binWidth, oldest)
+            if bins == None:
+                return False
+            self.ids, self.starts, self.px, self.py = bins
+            self.binWidth, self.source = binWidth, source
+            return True
+
+        # the oldest samples have gone: drop their bins, and recompute the bin now first
+        if self.starts[0] < oldest:
+            drop = np.searchsorted(self.starts, oldest, side="right") - 1
+            self.keep(slice(drop, None))
+            if len(self.ids) > 1:
+                end = self.starts[1] - oldest
+                bins = minMaxBins(x[:end], y[:end], binWidth, oldest)
+                self.keep(slice(1, None))
+                self.join(bins, atEnd=False)
+
+        # recompute the last bin, plus any appended samples
+        start = max(self.starts[-1], oldest)
+        if start - oldest < len(y):
+            bins = minMaxBins(x[start-oldest:], y[start-oldest:], binWidth, start)
+            self.keep(slice(None, -1))
+            if bins == None or (len(self.ids) > 0 and bins[0][0] <= self.ids[-1]):
+                self.reset()
+                return False
+            self.join(bins, atEnd=True)
+        return True
+
+    def keep(self, sel):
+        self.ids, self.starts, self.px, self.py = self.ids[sel], self.starts[sel], self.px[sel], self.py[sel]
+
+    def join(self, bins, atEnd):
+        if atEnd:
+            pairs = zip((self.ids, self.starts, self.px, self.py), bins)
+        else:
+            pairs = zip(bins, (self.ids, self.starts, self.px, self.py))
+        self.ids, self.starts, self.px, self.py = [ np.concatenate(pair) for pair in pairs ]
+
+    def visible(self, xmin=None, xmax=None):
+        ''' visible - the range of bins covering xmin to xmax, plus one bin either side.
+            Without a range, all the bins.
+        '''
+        if xmin == None:
+            return 0, len(self.ids)
+        lo = np.searchsorted(self.ids, np.floor(xmin/self.binWidth), side="left") - 1
+        hi = np.searchsorted(self.ids, np.floor(xmax/self.binWidth), side="right") + 1
+        return max(lo, 0), min(hi, len(self.ids))
+
+    def samples(self, lo, hi):
+        ''' samples - the first and last+1 buffer index of the values in bins lo to hi '''
+        first = self.starts[lo] - self.oldest if lo < len(self.ids) else 0
+        last = self.starts[hi] - self.oldest if hi < len(self.ids) else None
+        return max(first, 0), last
+
+    def points(self, lo, hi):
+        ''' points - x and y arrays for the bins lo to hi '''
+        return self.px[lo:hi].ravel(), self.py[lo:hi].ravel()
+
+class historyTier:
+    ''' historyTier - one level of a historyStore '''
+    def __init__(self, length):
+        self.x, self.low, self.high, self.mean = [ ringBuffer(length) for idx in range(4) ]
+        self.pending = None         # entries from the tier below that do not yet fill a bucket
+
+    def __len__(self):
+        return len(self.x)
+
+    def clear(self):
+        for buf in (self.x, self.low, self.high, self.mean):
+            buf.clear()
+        self.pending = None
+
+    def add(self, x, low, high, mean, factor):
+        ''' add - add entries from the tier below, and return any completed buckets '''
+        if self.pending != None:
+            x, low, high, mean = [ np.concatenate(pair) for pair in zip(self.pending, (x, low, high, mean)) ]
+        full = len(x) // factor * factor
+        self.pending = tuple( arr[full:].copy() for arr in (x, low, high, mean) )
+        if full == 0:
+            return None
+        x = x[:full:factor]
+        low = low[:full].reshape(-1, factor).min(axis=1)
+        high = high[:full].reshape(-1, factor).max(axis=1)
+        mean = mean[:full].reshape(-1, factor).mean(axis=1)
+        for buf, values in zip((self.x, self.low, self.high, self.mean), (x, low, high, mean)):
+            buf.extend(values)
+        return x, low, high, mean
+
+class historyStore:
+    ''' historyStore - tiers of min/max/mean buckets of an x,y pair of ringBuffers. Only
+        meaningful when values are appended in pairs with a rising x, as for plots against time.
+    '''
+    def __init__(self, tiers=3, factor=16, length=2048):
+        self.factor = factor
+        self.tiers = [ historyTier(length) for idx in range(tiers) ]
+        self.reset()
+
+    def reset(self):
+        self.source = None
+        self.fed = 0                # sample number of the next value to add
+        for tier in self.tiers:
+            tier.clear()
+
+    def add(self, x, y):
+        ''' add - add arrays of values older than anything in the buffers, such as from a historyFile '''
+        buckets = (x, y, y, y)
+        for tier in self.tiers:
+            buckets = tier.add(*buckets, self.factor)
+            if buckets == None:
+                break
+
+    def unfed(self, ybuf):
+        ''' unfed - the number of values in the buffer not yet added '''
+        return ybuf.total - self.fed
+
+    def update(self, xbuf, ybuf):
+        ''' update - add the values that have arrived since the last update '''
+        oldest = ybuf.total - len(ybuf)
+        source = (xbuf, ybuf, xbuf.generation, ybuf.generation, xbuf.total - ybuf.total)
+        if source != self.source:
+            if self.source != None:
+                self.reset()
+            self.source = source
+            self.fed = oldest
+        start = max(self.fed, oldest)
+        self.fed = ybuf.total
+        if start >= ybuf.total:
+            return
+        self.add(xbuf.view()[start-oldest:], ybuf.view()[start-oldest:])
+
+    def points(self, xmin, xmax, before, maxPoints):
+        ''' points - x and y arrays of the low and high of each bucket from xmin to xmax, stopping
+            short of 'before', from the finest tier that reaches back to xmin in no more than
+            maxPoints points.
+        '''
+        chosen = None
+        for tier in self.tiers:
+            if len(tier) == 0:
+                break
+            x = tier.x.view()
+            lo = max(np.searchsorted(x, xmin, side="right") - 1, 0)
+            hi = min(np.searchsorted(x, xmax, side="right") + 1, np.searchsorted(x, before, side="left"))
+            chosen = (tier, lo, hi)
+            if x[0] <= xmin and 2*(hi-lo) <= maxPoints:
+                break
+        if chosen == None or chosen[2] <= chosen[1]:
+            return np.zeros(0), np.zeros(0)
+        tier, lo, hi = chosen
+        px = np.repeat(tier.x.view()[lo:hi], 2)
+        py = np.stack((tier.low.view()[lo:hi], tier.high.view()[lo:hi]), axis=1).ravel()
+        return px, py
+
+class historyFile:
+    ''' historyFile - x,y samples in a memory-mapped .npy file of 'length' rows, used as a ring.
+        Unused rows have an x of NaN. x must rise, as it does for plots against time.
+    '''
+    def __init__(self, filename, length):
+        self.filename = filename
+        self.users = []             # the first user writes the file
+        self.data = None
+        try:
+            if os.path.exists(filename):
+                data = np.load(filename, mmap_mode="r+")
+                if data.shape == (length, 2) and data.dtype == np.float64:
+                    self.data = data
+                else:
+                    print(f"historyFile: {filename} has shape {data.shape}, expected {(length, 2)}: starting again")
+            if self.data is None:
+                self.data = np.lib.format.open_memmap(filename, mode="w+", dtype=np.float64, shape=(length, 2))
+                self.data[:,0] = np.nan
+        except (OSError, ValueError) as exc:
+            print(f"historyFile: unable to map {filename}: {exc}")
+            self.data = None
+            return
+        x = self.data[:,0]
+        if np.all(np.isnan(x)):
+            self.next, self.lastX = 0, -np.inf
+        else:
+            newest = np.nanargmax(x)
+            self.next, self.lastX = (newest+1) % length, x[newest]
+
+    def __repr__(self):
+        return f"<historyFile {self.filename}>"
+
+    def samples(self):
+        ''' samples - the x and y arrays of the samples in the file, oldest first '''
+        rows = np.concatenate((self.data[self.next:], self.data[:self.next]))
+        rows = rows[~np.isnan(rows[:,0])]
+        return rows[:,0], rows[:,1]
+
+    def update(self, user, xbuf, ybuf):
+        ''' update - write the samples in the buffers that are newer than the file '''
+        if len(self.users) == 0 or self.users[0] is not user or len(xbuf) == 0:
+            return
+        x, y = xbuf.view(), ybuf.view()
+        first = np.searchsorted(x, self.lastX, side="right")
+        num = len(x) - first
+        if num <= 0:
+            return
+        length = len(self.data)
+        if num > length:
+            first, num = len(x) - length, length
+        rows = (self.next + np.arange(num)) % length
+        self.data[rows, 0] = x[first:]
+        self.data[rows, 1] = y[first:]
+        self.next = (self.next + num) % length
+        self.lastX = x[-1]
+
+    def release(self, user):
+        ''' release - stop using the file. When no one is, flush it and forget it '''
+        if user in self.users:
+            self.users.remove(user)
+        if len(self.users) == 0:
+            self.data.flush()
+            historyFiles.pop(self.filename, None)
+
+def openHistoryFile(name, length, user):
+    ''' openHistoryFile - the historyFile for 'name', or None if history files are not in use '''
+    if historyDir == None:
+        return None
+    # percent-escaped, so that each PV name has its own file
+    filename = os.path.join(historyDir, quote(name, safe="") + ".npy")
+    hfile = historyFiles.get(filename)
+    if hfile == None:
+        hfile = historyFile(filename, length)
+        if hfile.data is None:
+            return None
+        historyFiles[filename] = hfile
+    hfile.users.append(user)
+    return hfile
+
+def closeHistoryFiles():
+    ''' closeHistoryFiles - flush all open history files '''
+    for hfile in list(historyFiles.values()):
+        hfile.data.flush()
+    historyFiles.clear()
+
+def setHistoryDir(dirname):
+    ''' setHistoryDir - keep the history of rolling time plots in 'dirname' '''
+    global historyDir
+    try:
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        historyDir = dirname
+    except OSError as exc:
+        print(f"Unable to use plot history directory {dirname}: {exc}")
+        historyDir = None
+
+historyDir = None
+historyFiles = {}   # filename : historyFile
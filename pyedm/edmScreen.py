@@ -140,6 +140,19 @@ class edmScreen(edmObject):
                 self.tags[f.tag].field = f
             except KeyError:
                 pass    # tags do not have to be complete
+        edmFont.warmFonts(self.fontNames(), edmApp.rescale)
+
+    def fontNames(self):
+        ''' fontNames - the set of font names used by this screen and its objects '''
+        names = set()
+        pending = [ self ]
+        while pending:
+            obj = pending.pop()
+            for tag in obj.tags.values():
+                if (tag.tag == "font" or tag.tag.endswith("Font")) and type(tag.value) == str:
+                    names.add(tag.value)
+            pending.extend(getattr(obj, "objectList", []))
+        return names
 
     def readJSONfile(self,fn, macroTable, paths):
         try:
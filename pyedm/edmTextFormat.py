@@ -47,3 +47,79 @@ def addUnits(units, showUnits):
     if units and units != "" and showUnits:
         return " "+units
     return ""
+
+# Precompiled formatters. buildFormatter(conv, precision, units, showUnits) returns
+# a callable 'formatter(value, charValue=None)' that gives the same text as
+#   conv(value, charValue=charValue, precision=precision, units=units, showUnits=showUnits)
+# with the format string and units suffix built once. Formatters are shared
+# between widgets with the same settings. A widget should keep its formatter,
+# and ask for a new one only when the precision or units change.
+
+def compileDefault(precision, suffix):
+    fmt = f"%.{precision}f"
+    def formatter(value, charValue=None):
+        try: return fmt % float(value) + suffix
+        except (TypeError, ValueError, OverflowError): return str(value) + suffix
+    return formatter
+
+def compileDecimal(precision, suffix):
+    fmt = f"%.{precision}f"
+    intFmt = f"%{precision}d"
+    def formatter(value, charValue=None):
+        if type(value) == int:
+            return "%d" % value + suffix
+        try: return fmt % float(value) + suffix
+        except ValueError:
+            pass
+        try: return intFmt % int(value) + suffix
+        except (TypeError, ValueError, OverflowError): return str(value)
+    return formatter
+
+def compileHex(precision, suffix):
+    def formatter(value, charValue=None):
+        try: return "%x" % int(value) + suffix
+        except (TypeError, ValueError, OverflowError): return str(value) + suffix
+    return formatter
+
+def compileEngineer(precision, suffix):
+    fmt = f"%.{precision}g"
+    def formatter(value, charValue=None):
+        try: return fmt % float(value) + suffix
+        except (TypeError, ValueError, OverflowError): return str(value)
+    return formatter
+
+def compileExp(precision, suffix):
+    fmt = f"%.{precision}e"
+    def formatter(value, charValue=None):
+        try: return fmt % float(value) + suffix
+        except (TypeError, ValueError, OverflowError): return str(value)
+    return formatter
+
+compileTable = {
+        convDefault : compileDefault,
+        convDecimal : compileDecimal,
+        convHex : compileHex,
+        convEngineer : compileEngineer,
+        convExp : compileExp,
+        }
+
+formatterCache = {}
+
+def buildFormatter(conv, precision=-1, units=None, showUnits=False):
+    ''' buildFormatter(conv, precision, units, showUnits) - return a formatter(value, charValue=None)
+        for one of the conv... functions, with the settings fixed
+    '''
+    key = (conv, precision, units, showUnits)
+    formatter = formatterCache.get(key)
+    if formatter != None:
+        return formatter
+    if conv in compileTable and type(precision) == int and precision >= 0:
+        formatter = compileTable[conv](precision, addUnits(units, showUnits))
+    else:
+        # special cases (no precision, charValue) use the general routine
+        def formatter(value, charValue=None):
+            return conv(value, charValue=charValue, precision=precision, units=units, showUnits=showUnits)
+    if len(formatterCache) > 1000:
+        formatterCache.clear()
+    formatterCache[key] = formatter
+    return formatter
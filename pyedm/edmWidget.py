@@ -12,7 +12,7 @@ from typing import Callable, Any
 import traceback
 
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPalette, QFontDatabase
+from PyQt5.QtGui import QPalette, QColor, QFontDatabase
 
 from .edmPVfactory import buildPV, expandPVname, edmPVbase
 from .edmApp import edmApp
@@ -24,17 +24,68 @@ from .edmWidgetSupport import edmWidgetSupport
 from .edmEditWidget import edmEdit, fontAlignEnum, groupMenuEnum, edmRubberband
 from .edmScreen import edmScreen
 
+# Shared palettes. Widgets that start from the same palette and have the same
+# color overrides use the same QPalette instance, so a color change is a
+# dictionary lookup and a setPalette, and no palette is built twice.
+#   paletteCache - (base signature, ((role, rgba), ...)) -> QPalette, where the
+#                  signature is the rgba of every color of the starting palette
+# Each widget keeps its own starting palette (see paletteBase), so the cache
+# can be cleared at any time.
+paletteCache = {}
+paletteCacheMax = 4000
+paletteGroups = (QPalette.Active, QPalette.Inactive, QPalette.Disabled)
+
+def paletteBase(pal):
+    ''' paletteBase(pal) - return (signature, copy of 'pal') for a starting palette '''
+    signature = tuple( pal.color(group, role).rgba() for group in paletteGroups for role in range(QPalette.NColorRoles) )
+    return (signature, QPalette(pal))
+
+def cachedPalette(base, overrides):
+    ''' cachedPalette(base, overrides) - return the shared palette
+        for a starting palette with a set of (role, rgba) overrides.
+    '''
+    signature, basePalette = base
+    key = (signature, overrides)
+    try:
+        return paletteCache[key]
+    except KeyError:
+        pass
+    if len(paletteCache) >= paletteCacheMax:
+        paletteCache.clear()
+    pal = QPalette(basePalette)
+    for colorRole, rgba in overrides:
+        color = QColor.fromRgba(rgba)
+        for group in paletteGroups:
+            pal.setColor( group, colorRole, color)
+    paletteCache[key] = pal
+    return pal
+
 # assign a color to a palette set
 def setupPalette(widget, color, paletteList):
     if len(paletteList) == 0:
         print("setupPalette: ignoring widget", widget, "color", color)
         return
-    pal = widget.palette()
+    try:
+        rgba = color.rgba()
+    except AttributeError:      # Qt.GlobalColor
+        rgba = QColor(color).rgba()
+    current = widget.palette()
+    # the widget remembers its starting palette and its color overrides. If its
+    # palette was changed some other way since we last set it, start again from that.
+    if getattr(widget, "edmPaletteKey", None) != current.cacheKey():
+        widget.edmPaletteBase = paletteBase(current)
+        widget.edmPaletteColors = {}
+    colors = widget.edmPaletteColors
+    changed = False
     for colorRole in paletteList:
-        pal.setColor( QPalette.Active, colorRole, color)
-        pal.setColor( QPalette.Inactive, colorRole, color )
-        pal.setColor( QPalette.Disabled, colorRole, color )
+        if colors.get(colorRole) != rgba:
+            colors[colorRole] = rgba
+            changed = True
+    if not changed:
+        return
+    pal = cachedPalette(widget.edmPaletteBase, tuple(sorted(colors.items())))
     widget.setPalette(pal)
+    widget.edmPaletteKey = widget.palette().cacheKey()
 
 #
 class reColorInfo:
@@ -59,14 +110,18 @@ class reColorInfo:
         self.nullColor = None
         self.colorPalette = ()
         self.lastColor = None
+        self.blinking = False
 
     def __repr__(self):
         return f"<reColorInfo {self.widget} {self.colorRule}>"
 
     def debug(self, *args, **kw):
-        self.widget.debug(*args, **kw)
+        return self.widget.debug(*args, **kw)
 
     def edmCleanup(self):
+        if self.blinking:
+            edmApp.delBlink(self.widget, self)
+            self.blinking = False
         try:
             self.alarmpv.del_callback(self)
             self.alarmpv = None
@@ -85,6 +140,19 @@ class reColorInfo:
         self.alarmpv = alarmPV
         alarmPV.add_callback( self.onAlarmUpdate, self)
 
+    def replacePV(self, oldPV, newPV):
+        ''' replacePV(oldPV, newPV) - after a widget PV has been rebuilt,
+            move the alarm and color references from the old PV to the new one.
+        '''
+        if oldPV == None:
+            return
+        if self.alarmpv is oldPV:
+            oldPV.del_callback(self)
+            self.addAlarmStatus(newPV, self.widget)
+        if self.colorPV is oldPV:
+            oldPV.del_callback(self)
+            self.addColorPV(newPV)
+
     def addColorPV(self, colorPV):
         self.debug(mesg=f"addColorPV {self}, {colorPV}")
         self.colorPV = colorPV
@@ -126,7 +194,8 @@ class reColorInfo:
     # variables.
     def setColor(self, force=False):
         if self.widget == None: return  # true if edmCleanup in progress
-        self.debug(mesg=f'setColor, {self} {self.alarmSensitive} {self.alarmStatus}')
+        if self.debug(): print(f'setColor, {self} {self.alarmSensitive} {self.alarmStatus}')
+        blinkCol = None
         if self.widget.transparent:
             col = edmColors.colorRule.invisible
         elif self.alarmSensitive and (self.alarmStatus > 0 or not self.alarmpv.isValid):
@@ -136,9 +205,12 @@ class reColorInfo:
                 self.debug(mesg=f"colorInfo: no color rule!")
                 return None
             if self.useNull:
-                col = self.nullColor.getColor(self.colorValue)
+                col, blinkCol = self.nullColor.getColors(self.colorValue)
             else:
-                col = self.colorRule.getColor( self.colorValue)
+                col, blinkCol = self.colorRule.getColors( self.colorValue)
+        self.setBlink(blinkCol != None)
+        if blinkCol != None and edmApp.blinkPhase:
+            col = blinkCol
         if col != self.lastColor or force:
             self.debug(mesg=f"Changing {self.widget} palette {col} {self.colorPalette} {self.colorValue} {self.alarmStatus} {self.alarmSensitive}")
             self.lastColor = col
@@ -146,6 +218,16 @@ class reColorInfo:
                 setupPalette(self.widget, col, self.colorPalette)
         return col
 
+    def setBlink(self, blinking):
+        ''' setBlink(blinking) - register (or unregister) the widget for the shared blink timer '''
+        if blinking == self.blinking:
+            return
+        self.blinking = blinking
+        if blinking:
+            edmApp.addBlink(self.widget, self)
+        else:
+            edmApp.delBlink(self.widget, self)
+
 @dataclass
 class pvItemClass:
     '''
@@ -182,6 +264,7 @@ class edmWidget(edmWidgetSupport):
             Some edmWidget instance attributes are set indirectly from values in pvItem. In derived classes, class-specific attributes are set indirectly
             from values in the pvItem property.
     '''
+    pixmapStatic = False        # class may be drawn into a static layer; see isStatic()
     edmBaseFields = [ 
         edmField("Class", edmEdit.Class, defaultValue="Unknown", readonly=True),
         edmField("major", edmEdit.Int, defaultValue=4, hidden=True),
@@ -233,6 +316,7 @@ class edmWidget(edmWidgetSupport):
         self.defaultFontTag = "textFont"
         self.defaultAlignTag = "textAlign"
         self.showEditWindow = None
+        self.inStaticLayer = False      # drawn from the parent's static layer (see edmParentSupport.buildStaticLayer)
         # The 4 most common PV's. These can be over-ridden, and are not mandatory
         # the dictionary key is the name as used in edm screens.
         self.pvItem = {
@@ -264,6 +348,7 @@ class edmWidget(edmWidgetSupport):
             self.bgColorInfo.edmCleanup()
         except AttributeError:
             pass
+        edmApp.delBlink(self)
         # if there is no valid Qt C++ component, quietly fail.
         try:
             for ch in self.children():
@@ -273,6 +358,10 @@ class edmWidget(edmWidgetSupport):
         # remove all known PV references
         for pvinfo in self.pvItem:
             self.delPV(pvRef=self.pvItem[pvinfo].attributePV, attrName=self.pvItem[pvinfo].attributeName)
+        try:
+            self.findMacroTable().removeDependent(self)
+        except AttributeError:
+            pass
 
         self.edmParent = None
         self.setParent(None)
@@ -589,7 +678,7 @@ class edmWidget(edmWidgetSupport):
             oldPV = getattr(self, item.attributePV, None)
             if oldPV != None:
                 pref, newName = expandPVname(pvName, mt)
-                if pref.upper() == oldPV.prefix and newName == oldPV.name:
+                if pref.upper()+"\\" == oldPV.prefix and newName == oldPV.name:
                     # no change
                     return oldPV
             # get rid of the old PV
@@ -599,6 +688,8 @@ class edmWidget(edmWidgetSupport):
 
         pv = buildPV(pvName, macroTable=mt,
             connectCallback=item.conCallback, connectCallbackArg=item.conCallbackArg)
+        if mt != None:
+            mt.addDependent(pvName, self, tag)
         setattr(self, item.attributePV, pv)
         if item.redisplay:
             pv.add_redisplay(self)
@@ -606,6 +697,59 @@ class edmWidget(edmWidgetSupport):
             pv.add_callback(item.dataCallback, self, item.dataCallbackArg)
         return pv
 
+    def macroChanged(self, keys):
+        ''' macroChanged(keys) - called when a macro used by this widget changes.
+            'keys' are pvItem tags whose PV names used the macro, or "label".
+            Only the PVs whose expanded name has changed are rebuilt; color
+            rules that referenced a replaced PV are moved to the new PV.
+            A widget with a replaced PV is redisplayed when the new PV connects;
+            otherwise only a label change needs a redisplay.
+        '''
+        if self.debug() : print(f"macroChanged {self} {keys}")
+        colorInfoList = [ info for info in self.__dict__.values() if isinstance(info, reColorInfo) ]
+        replaced = False
+        for tag in keys:
+            if tag not in self.pvItem:
+                continue
+            oldPV = getattr(self, self.pvItem[tag].attributePV, None)
+            newPV = self.pvSet(tag=tag, checkChanged=True)
+            if newPV is oldPV:
+                continue
+            replaced = True
+            for info in colorInfoList:
+                info.replacePV(oldPV, newPV)
+        if "label" in keys:
+            self.macroRelabel()
+            if self.inStaticLayer:
+                self.parentWidget().invalidateStaticLayer()
+        if "label" in keys and not replaced:
+            edmApp.redisplay(self)
+
+    def isStatic(self):
+        ''' isStatic - True if this widget can be drawn once into its window's static
+            layer: the class allows it, and there are no PVs, color rules or blinking colors.
+        '''
+        if not self.pixmapStatic:
+            return False
+        for item in self.pvItem.values():
+            if getattr(self, item.attributePV, None) != None:
+                return False
+        for info in self.__dict__.values():
+            if not isinstance(info, reColorInfo):
+                continue
+            if info.colorPV != None or info.alarmpv != None or info.nullPV != None:
+                return False
+            rule = info.colorRule
+            if rule != None and (rule.isRule() or any(r.blinking for r in rule.ruleList)):
+                return False
+        return True
+
+    def macroRelabel(self):
+        ''' macroRelabel - called when a macro used by a watched label
+            (see macroExpand) changes. Widgets that watch labels over-ride this.
+        '''
+        pass
+
     # determine the name to use for a PV. 'None' is a valid return, indicating
     # that this tag doesn't have a valid value
     def getName(self, pvname, tag):
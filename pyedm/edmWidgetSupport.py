@@ -11,15 +11,28 @@ from .edmApp import edmApp, debugClass
 
 class edmWidgetSupport(debugClass):
 
-    def macroExpand(self, str):
-        '''find the appropriate macro table, and return the expanded string'''
-        try: return self.findMacroTable().expand(str)
+    def macroExpand(self, str, watch=False):
+        '''find the appropriate macro table, and return the expanded string
+            if 'watch' is set, macroChanged({"label"}) is called when a macro
+            used by 'str' changes.
+        '''
+        try:
+            mt = self.findMacroTable()
+            if watch:
+                mt.addDependent(str, self, "label")
+            return mt.expand(str)
         except TypeError as e:
             print(f"type error in macro expand: {type(str)} {str}")
         except Exception as e:
             print("macro expansion failed for", self, e.message)
         return str
 
+    def macroChanged(self, keys):
+        '''called when a macro used by this instance changes. Inheriting
+            classes that watch macros must over-ride this.
+        '''
+        pass
+
     def findMacroTable(self):
         '''find the appropriate macro table for this widget instance'''
         try:
@@ -71,6 +71,8 @@ class edmWindowWidget(QtWidgets.QWidget, edmWidgetSupport, edmParentSupport):
         self.parentx = 0
         self.parenty = 0
         generateWidget(screen, self)
+        if self.usePixmap():
+            self.buildStaticLayer()
         self.show()
         if edmApp.debug() : print("done generateWindow")
         return self
@@ -85,11 +87,7 @@ class edmWindowWidget(QtWidgets.QWidget, edmWidgetSupport, edmParentSupport):
         if self.bgRule:
                 pal.setColor( self.backgroundRole(), self.bgRule.getColor() )
 
-        title = self.getProperty("title")
-        if title != "":
-            self.setWindowTitle("PyEdm - " + self.macroExpand(title))
-        else:
-            self.setWindowTitle("PyEdm - " + self.getProperty("Filename"))
+        self.setEdmTitle()
         self.setPalette(pal)
         x = self.getProperty("x")
         y = self.getProperty("y")
@@ -98,6 +96,17 @@ class edmWindowWidget(QtWidgets.QWidget, edmWidgetSupport, edmParentSupport):
         h = self.getProperty("h")
         self.resize(int(w*edmApp.rescale),int(h*edmApp.rescale))
 
+    def setEdmTitle(self):
+        title = self.getProperty("title")
+        if title != "":
+            self.setWindowTitle("PyEdm - " + self.macroExpand(title, watch=True))
+        else:
+            self.setWindowTitle("PyEdm - " + self.getProperty("Filename"))
+
+    def macroChanged(self, keys):
+        if "label" in keys:
+            self.setEdmTitle()
+
     def getParentScreen(self):
         try:
             return self.edmParent.getParentScreen()
@@ -119,6 +128,7 @@ class edmWindowWidget(QtWidgets.QWidget, edmWidgetSupport, edmParentSupport):
         mouseMoveEvent(self, event)
 
     def resizeEvent(self, event):
+        self.invalidateStaticLayer()
         self.setProperty("w", self.width())
         self.setProperty("h", self.height())
 
@@ -127,6 +137,21 @@ class edmWindowWidget(QtWidgets.QWidget, edmWidgetSupport, edmParentSupport):
         self.setProperty("x", pos.x())
         self.setProperty("y", pos.y())
 
+    flatParent = True
+
+    def paintEvent(self, event):
+        self.paintFlatChildren(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.isWindow():
+            edmApp.exposeWindow(self)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QtCore.QEvent.WindowStateChange and self.isWindow() and not self.isMinimized():
+            edmApp.exposeWindow(self)
+
     def closeEvent(self, event):
         ''' before closing a window, give all
             widgets a chance to clean up.
@@ -149,6 +174,12 @@ class edmWindowWidget(QtWidgets.QWidget, edmWidgetSupport, edmParentSupport):
         self.focusedWidget = None
         self.buttonInterest.clear()
         self.edmEditList.clear()
+        self.flatChildren.clear()
+        self.staticChildren.clear()
+        self.staticLayer = None
+        if getattr(self, "macroTable", None) != None:
+            self.macroTable.removeDependent(self)
+        edmApp.dropWindow(self)
 
         for child in self.children():
             try:
@@ -176,7 +207,7 @@ class edmWindowWidget(QtWidgets.QWidget, edmWidgetSupport, edmParentSupport):
 
         screen.addTag("Filename", "**NEW**")
         screen.addTag("Class", "Screen")
-        window = generateWindow(screen, macroTable=edmApp.macroTable)
+        window = generateWindow(screen, macroTable=edmApp.macroTable.newTable())
         edmApp.windowList.append(window)
 
 def generateWidget(screen, parent):
@@ -196,6 +227,8 @@ def generateWidget(screen, parent):
             widget.buildFromObject(obj)
         else:
             if edmApp.debug() : print("Unknown object type", otype, "in", edmApp.edmClasses)
+    if getattr(parent, "flatParent", False):
+        parent.checkFlatChildren()
     if edmApp.debug() : print("Done generateWidget")
     
 def generateWindow(screen, **kw):
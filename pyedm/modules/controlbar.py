@@ -4,6 +4,7 @@
 from enum import Enum
 
 from .edmApp import edmApp
+from .edmFont import getFontMetrics
 from .edmWidget import edmWidget, pvItemClass, setupPalette
 from .edmField import edmField
 from .edmEditWidget import edmEdit
@@ -305,7 +306,7 @@ class activeSliderClass(QFrame, edmWidget):
             disp = convDefault(increment, precision=1)
         else:
             disp = convDefault(increment, precision=self.precision)
-        fm = QFontMetrics(self.edmFont)
+        fm = getFontMetrics(self.edmFont)
         self.incrementWidget.setFixedWidth(fm.width(f" {disp} "))
         self.incrementWidget.setText(disp)
         if self.debug() : print(f"setIncrementValue incr:{disp}({increment}) mul:{self.stepMul} min:{self.slider.minimum()} max:{self.slider.maximum()}")
@@ -58,8 +58,8 @@ class activeButtonClass(QPushButton, edmWidget):
         self.setAutoFillBackground(True)
         self.labeltype = objectDesc.getProperty("labelType")
         if self.labeltype == self.labelTypeEnum.literal:
-            self.onLabel = self.macroExpand(objectDesc.getProperty("onLabel"))
-            self.offLabel = self.macroExpand(objectDesc.getProperty("offLabel"))
+            self.onLabel = self.macroExpand(objectDesc.getProperty("onLabel"), watch=True)
+            self.offLabel = self.macroExpand(objectDesc.getProperty("offLabel"), watch=True)
             self.needLabel = False
         elif self.labeltype == self.labelTypeEnum.pvState:
             self.needLabel = True
@@ -111,6 +111,11 @@ class activeButtonClass(QPushButton, edmWidget):
         except: return 0
 
     # completely over-ride the default redisplay
+    def macroRelabel(self):
+        if self.labeltype == self.labelTypeEnum.literal:
+            self.onLabel = self.macroExpand(self.objectDesc.getProperty("onLabel"))
+            self.offLabel = self.macroExpand(self.objectDesc.getProperty("offLabel"))
+
     def redisplay(self, **kw):
         self.checkVisible()
         if self.transparent:
@@ -1,12 +1,12 @@
 # Copyright 2011 Canadian Light Source, Inc. See The file COPYRIGHT in this distribution for further information.
 # This module generates a display for drop-down menu
 
-# Oct/2022 reads the description, but doesn't implement anything yet
-#
 # MenuMux takes the value of the control PV, and uses this as an index
 # into the list of symbols and values for Macros, and resets macro
-# values based on the symbol. this doesn't effect any of the current
-# screen values, but should update values for new screens getting called.
+# values based on the symbol. Widgets on the current screen that use
+# one of these macros re-expand their PV names and labels (see
+# macroDictionary.setMacros), and new screens getting called inherit
+# the new values.
 #
 from .edmApp import edmApp
 from .edmWidget import edmWidget
@@ -19,6 +19,7 @@ from PyQt5 import QtCore
 
 class menuMuxClass(QComboBox,edmWidget):
     menuGroup = ["control", "Menu Mux"]
+    maxSymbols = 8
     edmEntityFields = [
             edmField("controlPv", edmEdit.PV, defaultValue=None),
             edmField("numItems", edmEdit.Int, defaultValue=2),
@@ -90,32 +91,59 @@ class menuMuxClass(QComboBox,edmWidget):
         self.initialState = self.objectDesc.getProperty("initialState")
         self.numItems = self.objectDesc.getProperty("numItems")
         self.symbolTag = self.objectDesc.getProperty("symbolTag",arrayCount=1)
-        self.valueList = [None]*self.numItems
-        self.symbolList = [None]*self.numItems
-        for i in range(0, self.numItems):
-            valname = "value%d"%(i,)
-            self.valueList[i] =  self.objectDesc.getProperty(valname)
+        # symbolN[item] is a macro name, and valueN[item] its value when 'item' is selected
+        self.valueList = []
+        self.symbolList = []
+        for i in range(0, self.maxSymbols):
             symname = "symbol%d"%(i,)
-            self.symbolList[i] =  self.objectDesc.getProperty(symname)
+            if not self.objectDesc.checkProperty(symname):
+                continue
+            self.symbolList.append( self.objectDesc.getProperty(symname, arrayCount=self.numItems))
+            self.valueList.append( self.objectDesc.getProperty("value%d"%(i,), arrayCount=self.numItems))
         while self.count() > 0:
             self.removeItem(0)
         self.addItems( self.symbolTag)
         self.setCurrentIndex(self.initialState)
+        self.setMacros(self.initialState)
         self.activated.connect(self.gotNewValue)
 
+    def setMacros(self, index):
+        ''' setMacros(index) - set the macros for the selected menu entry '''
+        try:
+            index = int(index)
+        except (TypeError, ValueError):
+            return
+        if index == self.lastIndex or index < 0 or index >= self.numItems:
+            return
+        self.lastIndex = index
+        macroList = []
+        for symbols, values in zip(self.symbolList, self.valueList):
+            if symbols[index] in [ None, "" ]:
+                continue
+            macroList.append( (symbols[index], values[index]) )
+        if self.debug() : print(f"menuMux setMacros {index} {macroList}")
+        mt = self.findMacroTable()
+        if mt != None:
+            mt.setMacros(macroList)
+
     def gotNewValue(self, value):
         if hasattr(self, "controlPV"):
             if self.controlPV.value == value:
                 return
             self.controlPV.put( value)
+        else:
+            self.setMacros(value)
 
     def redisplay(self):
     # called when the control PV changes
         self.checkVisible()
+        if self.controlPV.value is None:
+            return
         if self.controlPV.value < 0 or self.controlPV.value >= self.numItems:
             return
         if self.controlPV.value != self.currentIndex():
             self.setCurrentIndex(self.controlPV.value)
+        self.setMacros(self.controlPV.value)
 
 
 edmApp.edmClasses["menuMuxClass"] = menuMuxClass
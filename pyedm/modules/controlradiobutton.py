@@ -46,6 +46,8 @@ class activeRadioButtonClass(QWidget,edmWidget,edmParentSupport):
     def redisplay(self):
         # called when the control PV changes
         self.checkVisible()
+        if self.controlPV.value is None:
+            return
         # find the button that corresponds to the index, and mark it
         bt = self.group.button(int(self.controlPV.value) )
         if bt != None:
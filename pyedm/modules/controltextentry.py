@@ -11,15 +11,15 @@ from PyQt5.QtWidgets import QLineEdit
 from PyQt5.QtGui import QPalette
 from PyQt5.QtCore import Qt
 
-# relative execution of "from monitortext import TextupdateClass"
+# relative execution of "from monitortext import textupdateSupport"
 monitortext = edmImport("monitortext")
-TextupdateClass = monitortext.TextupdateClass
+textupdateSupport = monitortext.textupdateSupport
 
-class TextentryClass(TextupdateClass):
+class TextentryClass(QLineEdit, textupdateSupport):
     menuGroup = [ "control", "Text Entry" ]
 
     edmEntityFields = [
-            ] + TextupdateClass.edmEntityFields
+            ] + textupdateSupport.edmEntityFields
 
     V3propTable = {
         "7-0" : [ "controlPv", "displayMode", "precision", "INDEX", "fgColor", "fgAlarm", "INDEX", "fillColor", "colorPv", "filled",
@@ -49,7 +49,7 @@ class updownButtonClass(QWidget, edmWidget):
         super().buildFromObject(objectDesc, **kw)
         rebuild = kw.get('rebuild', False)
         self.invisible = objectDesc.getProperty("invisible")
-        self.label = self.macroExpand( objectDesc.getProperty("label"))
+        self.label = self.macroExpand( objectDesc.getProperty("label"), watch=True)
         self.coarseValue = objectDesc.getProperty("coarseValue")
         self.fineValue = objectDesc.getProperty("fineValue")
         self.rate = objectDesc.getProperty("rate")
@@ -65,6 +65,9 @@ class updownButtonClass(QWidget, edmWidget):
             self.actions = [ self.menu.addAction(menu, lambda arg=menu:self.onMenu(arg)) for menu in self.menuLabels ]
             self.popup = None
 
+    def macroRelabel(self):
+        self.label = self.macroExpand( self.objectDesc.getProperty("label"))
+
     def paintEvent(self, event=None):
         painter = QPainter(self)
         painter.setFont(self.edmFont)
@@ -20,6 +20,7 @@ class activeArcClass(abstractShape):
             edmField("fillMode", edmEdit.Enum, enumList=fillModeEnum, defaultValue="none")
             ]
     edmFieldList = abstractShape.edmBaseFields + abstractShape.edmShapeFields + edmEntityFields + abstractShape.edmVisFields
+    flattenable = True
     V3propTable = {
         "2-1" : [ "INDEX", "lineColor", "lineAlarm", "fill", "INDEX", "fillColor", "fillAlarm", "alarmPv",
                 "visPv", "visMin", "visMax", "lineWidth", "lineStyle", "startAngle", "totalAngle", "fillMode" ]
@@ -33,10 +34,7 @@ class activeArcClass(abstractShape):
         self.fillMode = objectDesc.getProperty("fillMode")
         edmApp.redisplay(self)
 
-    def paintEvent(self, event=None):
-        painter = QPainter(self)
-        if event == None:
-            painter.eraseRect(0, 0, self.width(), self.height() )
+    def drawShape(self, painter):
         pen = painter.pen()
         pen.setWidth(self.linewidth)
         pen.setColor( self.lineColorInfo.setColor())
@@ -11,6 +11,7 @@ from PyQt5.QtGui import QPainter
 class activeCircleClass(abstractShape):
     menuGroup = ["display", "Draw Circle"]
     edmFieldList = abstractShape.edmBaseFields + abstractShape.edmShapeFields + abstractShape.edmVisFields
+    flattenable = True
 
     V3propTable = {
         "2-0" : [ "lineColor", "lineAlarm", "fill", "fillColor", "fillAlarm", "alarmPv", "visPv", "visInvert", "visMin", "visMax", "lineWidth", "lineStyle" ],
@@ -28,14 +29,11 @@ class activeCircleClass(abstractShape):
         self.setGeometry(self.x(), self.y(),
             self.width()+w2, self.height()+w2)
 
-    def paintEvent(self, event=None):
-        painter = QPainter(self)
+    def drawShape(self, painter):
         pen = painter.pen()
         pen.setWidth(self.linewidth)
         pen.setColor( self.lineColorInfo.setColor() )
         painter.setPen(pen)
-        if event == None:
-            painter.eraseRect(0, 0, self.width(), self.height() )
         if self.fillColorInfo != None:
             painter.setBrush( self.fillColorInfo.setColor() )
         lw2 = self.linewidth
@@ -73,6 +73,11 @@ class activeGroupClass(QtWidgets.QWidget, edmParentSupport, edmWidget):
     def mouseMoveEvent(self, *args, **kw):
         mouseMoveEvent(self, *args, **kw)
 
+    flatParent = True
+
+    def paintEvent(self, event):
+        self.paintFlatChildren(event)
+
     def redisplay(self):
         self.checkVisible()
 
@@ -24,6 +24,7 @@ class activeLineClass(abstractShape):
             edmField( "arrows", edmEditEnum, defaultValue=0, enumList=arrowEnum)
             ]
     edmFieldList = abstractShape.edmBaseFields + abstractShape.edmShapeFields + edmEntityFields + abstractShape.edmVisFields
+    flattenable = True
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -32,12 +33,9 @@ class activeLineClass(abstractShape):
         super().buildFromObject(objectDesc, **kw)
         self.linewidth = objectDesc.getProperty("lineWidth")
 
-    def paintEvent(self, event=None):
+    def drawShape(self, painter):
         if self.npoints <= 1:
             return
-        painter = QPainter(self)
-        if event == None:
-            painter.eraseRect(0, 0, self.width(), self.height() )
         pen = painter.pen()
         pen.setColor( self.lineColorInfo.setColor() )
         pen.setWidth(self.linewidth)
@@ -60,7 +58,6 @@ class activeLineClass(abstractShape):
             self.drawArrow(painter, self.points[1], self.points[0])
         if self.arrows == "to" or self.arrows == "both":
             self.drawArrow(painter, self.points[self.npoints-2], self.points[self.npoints-1])
-        painter.end()
         
     def drawArrow(self, painter, fromPt, toPt):
         line = QLineF(QPointF(fromPt), QPointF(toPt) )
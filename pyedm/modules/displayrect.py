@@ -24,6 +24,7 @@ class activeRectangleClass(abstractShape):
                     }
 
     edmFieldList = abstractShape.edmBaseFields + abstractShape.edmShapeFields + abstractShape.edmVisFields
+    flattenable = True
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -37,12 +38,9 @@ class activeRectangleClass(abstractShape):
             self.setGeometry(self.x()-w, self.y()-w,
                 self.width()+w2, self.height()+w2)
             
-    def paintEvent(self, event=None):
-        painter = QPainter(self)
+    def drawShape(self, painter):
         w,h = self.width(), self.height()
         x,y = 0,0
-        if event == None:
-            painter.eraseRect(0, 0, w, h)
         pen = painter.pen()
         pen.setColor( self.lineColorInfo.setColor())
         pen.setWidth(self.linewidth)
@@ -39,9 +39,7 @@ class relatedDisplayClass(QPushButton,edmWidget):
 
     def buildFromObject(self, objectDesc, **kw):
         super().buildFromObject(objectDesc, **kw)
-        name = self.objectDesc.getProperty("buttonLabel", None)
-        if name != None:
-            self.setText(self.macroExpand(name))
+        self.macroRelabel()
         if self.objectDesc.getProperty("invisible",0) == 1:
             self.transparent = 1
             self.setFlat(1)
@@ -67,6 +65,11 @@ class relatedDisplayClass(QPushButton,edmWidget):
             self.actions = [ self.newmenu.addAction(menu, lambda idx=idx:self.onMenu(idx)) for (menu,idx) in zip(self.menulist,list(range(0,len(self.filename)))) ]
         self.edmParent.buttonInterest.append(self)
 
+    def macroRelabel(self):
+        name = self.objectDesc.getProperty("buttonLabel", None)
+        if name != None:
+            self.setText(self.macroExpand(name, watch=True))
+
     def edmCleanup(self):
         if self.debug() : print(f"cleanup related {self.generated} {self.widgets}")
         try:
@@ -8,6 +8,7 @@
 # rather than auto-adjustable displays, the work needs to be done here.
 import os
 from .edmApp import edmApp
+from .edmFont import getFontMetrics
 from .edmWidget import edmWidget, pvItemClass
 from .edmField import edmField, edmTag
 from .edmEditWidget import edmEdit
@@ -18,6 +19,7 @@ from PyQt5.QtCore import QPoint, QPointF
 
 class activeXTextClass(QLabel,edmWidget):
     menuGroup = [ "display", "Text Box" ]
+    pixmapStatic = True
 
     edmEntityFields = [
         edmField("value", edmEdit.TextBox, array=True),
@@ -57,13 +59,15 @@ class activeXTextClass(QLabel,edmWidget):
 
     def buildFromObject(self, objectDesc, **kw):
         super().buildFromObject(objectDesc, **kw)
+        self.macroRelabel()
 
+    def macroRelabel(self):
         if self.objectDesc.checkProperty("value") == False:
             value = [ "" ]
         else:
-            value = [ self.macroExpand(val) for val in self.objectDesc.getProperty("value",arrayCount=-1)]
+            value = [ self.macroExpand(val, watch=True) for val in self.objectDesc.getProperty("value",arrayCount=-1)]
 
-        fm = QFontMetrics(self.edmFont)
+        fm = getFontMetrics(self.edmFont)
         border = self.objectDesc.getProperty("border")
         autoSize = self.objectDesc.getProperty("autoSize") 
         lineWidth = self.objectDesc.getProperty("lineWidth") 
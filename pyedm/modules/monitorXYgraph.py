@@ -34,6 +34,7 @@ from .edmField import edmField, edmTag
 from .edmFont import toHTML
 from .edmEditWidget import edmEditField, edmEdit
 from .edmProperty import converter
+from .edmPlotData import ringBuffer, ringView, indexView, indexArray, minMaxEnvelope, historyStore, openHistoryFile
 
 from PyQt5.QtCore import Qt
 from PyQt5 import QtWidgets
@@ -41,8 +42,9 @@ from PyQt5.QtGui import QPen, QPalette, QFontMetrics, QFontInfo, QPainter
 import pyqtgraph as pgraph
 # from Exceptions import AttributeError
 
-import collections
+import math
 import time
+import numpy as np
 
 # custom screen for displaying an Axis: X, Y, or Y2
 class edmEditAxisScreen(edmEdit.SubScreen):
@@ -128,6 +130,41 @@ class edmEditCurveConfig(edmEdit.SubScreen):
             self.newValue.emit(tag,value)
         edmEdit.SubScreen.onDone(self)
 
+# Time axis labels. The format depends only on the range of the tick values,
+# and a label only on the second it falls in, so both are cached: panning
+# redraws the same few labels over and over. Labels that are not cached are
+# formatted together, with datetime64 for the formats that are part of an
+# ISO 8601 date when there are enough of them to repay its overhead.
+timeFormats = [ (3600*24, '%H:%M:%S'), (3600*24*30, '%d'), (3600*24*30*24, '%b'), (None, '%Y') ]
+isoFields = { '%H:%M:%S' : slice(11,19), '%d' : slice(8,10), '%Y' : slice(0,4) }
+isoLimit = 253402300800     # year 10000
+isoBatch = 32               # fewer labels than this are formatted one by one
+timeLabelCache = {}         # format : { second : label }
+timeLabelMax = 4096
+
+def strftimeLabel(fmt, second):
+    try:
+        return time.strftime(fmt, time.localtime(second))
+    except (ValueError, OverflowError, OSError):  ## Windows can't handle dates before 1970
+        return ''
+
+def timeLabels(values, fmt):
+    ''' timeLabels - the local time labels of a list of timestamps '''
+    labels = timeLabelCache.setdefault(fmt, {})
+    seconds = np.floor(np.asarray(values, dtype=np.float64)).tolist()
+    missing = [ second for second in set(seconds) if second not in labels and math.isfinite(second) ]
+    if len(missing) > 0:
+        if len(labels) + len(missing) > timeLabelMax:
+            labels.clear()
+        missing.sort()
+        field = isoFields.get(fmt)
+        if field is not None and len(missing) >= isoBatch and missing[0] >= 0 and missing[-1] < isoLimit:
+            iso = np.datetime_as_string(np.array(missing, dtype=np.int64).astype("datetime64[s]"), timezone="local")
+            labels.update(zip(missing, [ text[field] for text in iso.tolist() ]))
+        else:
+            labels.update(zip(missing, [ strftimeLabel(fmt, second) for second in missing ]))
+    return [ labels.get(second, '') for second in seconds ]
+
 class xAxisClass(pgraph.AxisItem):
     def setTickLabelMode(self, mode=0, base=0):
         '''
@@ -137,6 +174,18 @@ class xAxisClass(pgraph.AxisItem):
         '''
         self.tickMode = mode
         self.tickBase = base
+        self.formatKey = None
+
+    def timeFormat(self, values):
+        ''' timeFormat - the strftime format for the tick values, chosen by their range '''
+        key = (self.tickBase, max(values)-min(values))
+        if key != self.formatKey:
+            self.formatKey = key
+            if self.tickBase:
+                self.format = "-%H:%M:%S"
+            else:
+                self.format = [ fmt for limit, fmt in timeFormats if limit is None or key[1] < limit ][0]
+        return self.format
 
     def tickStrings(self, *args, **kw):
         if self.tickMode <  2:
@@ -150,42 +199,8 @@ class xAxisClass(pgraph.AxisItem):
         
         if len(values) < 1:
             return pgraph.AxisItem.tickStrings(self,*args,  **kw)
-        
-        rng = max(values)-min(values)
-        if self.tickBase:
-            string = "-%H:%M:%S"
-            label1 = "-%H"
-            label2 = "0"
-        elif rng < 3600*24:
-            string = '%H:%M:%S'
-            label1 = '%b %d -'
-            label2 = ' %b %d, %Y'
-        elif rng >= 3600*24 and rng < 3600*24*30:
-            string = '%d'
-            label1 = '%b - '
-            label2 = '%b, %Y'
-        elif rng >= 3600*24*30 and rng < 3600*24*30*24:
-            string = '%b'
-            label1 = '%Y -'
-            label2 = ' %Y'
-        elif rng >=3600*24*30*24:
-            string = '%Y'
-            label1 = ''
-            label2 = ''
-
-        strns = []
-        for x in values:
-            try:
-                strns.append(time.strftime(string, time.localtime(x)))
-            except ValueError:  ## Windows can't handle dates before 1970
-                strns.append('')
-        '''
-        try:
-            label = time.strftime(label1, time.localtime(min(values)))+time.strftime(label2, time.localtime(max(values)))
-        except ValueError:
-            label = ''
-        '''
-        return strns
+
+        return timeLabels(values, self.timeFormat(values))
 
 
 @dataclass
@@ -196,6 +211,151 @@ class onePVvalue:
     value : Any
     count : int
 
+class triggerStage:
+    ''' triggerStage - the latest x and y values of the trigger mode curves of a plot,
+        held until the trigger PV updates. Callbacks only store a value in the slot
+        for its curve and axis. A trigger takes every slot at once, by swapping in an
+        empty set, so a capture can't mix values from before and after the trigger,
+        and needs no lock against callbacks on other threads.
+    '''
+    def __init__(self):
+        self.slots = {}         # (curve, axis) : onePVvalue, where axis 0 is x and 1 is y
+        self.triggers = 0
+        self.stale = 0          # triggers that arrived before every input had updated
+
+    def put(self, curve, axis, value, count):
+        self.slots[(curve, axis)] = onePVvalue(value, count)
+
+    def take(self):
+        slots, self.slots = self.slots, {}
+        self.triggers += 1
+        return slots
+
+class plotSource:
+    ''' plotSource - the buffers for a y PV plotted against time or sample number.
+        Every curve that plots the same PV in the same way shares the one subscription
+        and pair of buffers, and reads its most recent nPts values through its own views.
+        The key is (PV name, update mode, x axis), as used in plotSources.
+    '''
+    def __init__(self, key, pvname, macroTable, timeBase):
+        self.key = key
+        self.timeBase = timeBase    # if False, x is the sample number
+        self.users = []             # (curve, widget)
+        self.views = []             # ringViews of the buffers
+        self.xdata = ringBuffer(1)
+        self.ydata = ringBuffer(1)
+        self.history = None
+        self.historyFile = None
+        self.waveform = None        # the last array value, while it is all of the data
+        self.stale = False          # True until the waveform is copied into ydata (see sync)
+        self.pv = buildPV(pvname, macroTable=macroTable)
+        self.pv.add_callback(self.dataCallback, self)
+
+    def __repr__(self):
+        return f"<plotSource {self.key} {len(self.users)} curves>"
+
+    def join(self, curve, widget, nPts):
+        ''' join - use this source for a curve of nPts values '''
+        if self.ydata.maxlen < nPts:
+            self.xdata.resize(nPts)
+            self.ydata.resize(nPts)
+        self.users.append((curve, widget))
+        curve.plotSource = self
+        curve.yPv = self.pv
+        curve.history = self.history
+        curve.edmYdata = ringView(self.ydata, nPts)
+        if self.timeBase:
+            curve.edmXdata = ringView(self.xdata, nPts)
+        else:
+            curve.edmXdata = indexView(self.ydata, nPts)
+        self.views += [ curve.edmXdata, curve.edmYdata ]
+        if len(self.ydata) > 0 or self.stale:
+            widget.markDirty(curve)
+
+    def leave(self, curve):
+        ''' leave - stop using this source for a curve. When no curves are left, disconnect. '''
+        self.users = [ user for user in self.users if user[0] is not curve ]
+        self.views = [ view for view in self.views if view is not curve.edmXdata and view is not curve.edmYdata ]
+        curve.plotSource = None
+        if len(self.users) > 0:
+            return
+        self.updateHistory()
+        if self.historyFile is not None:
+            self.historyFile.release(self)
+            self.historyFile = None
+        self.pv.del_callback(self)
+        if plotSources.get(self.key) is self:
+            del plotSources[self.key]
+
+    def enableHistory(self, tiers, factor, length, fileLength):
+        ''' enableHistory - keep history tiers, and a history file if they are in use. Samples from
+            the file that are older than those in the buffers are reloaded: the most recent into the
+            buffers, and the rest into the history tiers.
+        '''
+        if self.history is not None or not self.timeBase:
+            return
+        self.sync()
+        self.history = historyStore(tiers, factor, length)
+        for curve, widget in self.users:
+            curve.history = self.history
+        self.historyFile = openHistoryFile(self.pv.getPVname(), fileLength, self)
+        if self.historyFile is None:
+            return
+        x, y = self.historyFile.samples()
+        if len(self.xdata) > 0:
+            older = np.searchsorted(x, self.xdata[0], side="left")
+            x = np.concatenate((x[:older], self.xdata.view()))
+            y = np.concatenate((y[:older], self.ydata.view()))
+        older = max(len(x) - self.ydata.maxlen, 0)
+        self.history.add(x[:older], y[:older])
+        self.xdata.replace(x[older:])
+        self.ydata.replace(y[older:])
+        for curve, widget in self.users:
+            widget.markDirty(curve)
+
+    def updateHistory(self):
+        ''' updateHistory - add new values to the history tiers, and to the history file '''
+        if self.history is None:
+            return
+        self.sync()
+        self.history.update(self.xdata, self.ydata)
+        if self.historyFile is not None:
+            self.historyFile.update(self, self.xdata, self.ydata)
+
+    def sync(self):
+        ''' sync - copy the latest waveform into ydata, before ydata is read '''
+        if self.stale:
+            self.stale = False
+            self.ydata.replace(self.waveform)
+
+    # called when the PV updates. A single value is added to the buffers,
+    # an array replaces it. The copy of an array into ydata waits until ydata
+    # is read, as scope mode curves plot the array itself.
+    def dataCallback(self, widget, userArgs=None, **args):
+        num = args['count']
+        if num <= 1:
+            self.sync()
+            self.waveform = None
+            self.ydata.append(args['value'])
+        else:
+            if self.ydata.maxlen < num:
+                self.xdata.resize(num)
+                self.ydata.resize(num)
+                for view in self.views:
+                    view.maxlen = max(view.maxlen, num)
+            self.waveform = np.asarray(args['value'], dtype=np.float64)
+            self.stale = True
+        if self.timeBase:
+            self.xdata.append(time.time())
+        if self.history is not None:
+            self.sync()
+            if self.history.unfed(self.ydata) >= self.ydata.maxlen//2:
+                self.updateHistory()    # before values are lost from the buffer
+        for curve, widget in self.users:
+            widget.markDirty(curve)
+
+plotSources = {}    # (PV name, update mode, x axis) : plotSource
+
 
 class xyGraphClass(pgraph.PlotWidget, edmWidget):
     menuGroup = [ "monitor", "XY Plot" ]
@@ -209,6 +369,11 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
     lineStyleEnum = Enum("lineStyle", "solid dash", start=0)
     xAxisTimeEnum = Enum("xAxisTime", "seconds date dateTime", start=0)
     opModeEnum = Enum("opMode", "scope plot", start=0)
+    decimateFactor = 4      # curves with more points than this per pixel are drawn as a min/max envelope
+    historyTiers = 3        # tiers of older history kept for time plots; 0 to disable
+    historyFactor = 16      # number of samples, or buckets of the tier below, in each bucket
+    historyLength = 2048    # number of buckets in each tier
+    historyFileLength = 262144  # number of samples kept in a history file (see --plothistory)
 
     edmEntityFields = [
             edmField("triggerPv", edmEdit.PV, defaultValue=None),
@@ -305,6 +470,11 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
         super().__init__(parent, *args, axisItems=axisArg)
         self.pvItem["triggerPv"] = pvItemClass( 'triggerName', 'triggerPV', dataCallback=self.triggerCallback)
         self.pvItem["resetPv"]   = pvItemClass( 'resetName', 'resetPV', dataCallback=self.resetCallback)
+        self.getViewBox().sigXRangeChanged.connect(self.viewChanged)
+        self.getViewBox().sigResized.connect(self.viewChanged)
+        self.stage = triggerStage()
+        if self.getViewBox().menu is not None:
+            self.getViewBox().menu.addAction("Save Data...", self.onSaveData)
         # self.debug(setDebug = 1)
 
     # I think this bug is now fixed....
@@ -318,6 +488,8 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
     def edmCleanup(self):
         try:
             for curve in self.curves:
+                if curve.plotSource is not None:
+                    curve.plotSource.leave(curve)
                 if curve.xPv:
                     curve.xPv.del_callback(self)
                 if curve.yPv:
@@ -373,7 +545,7 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
         self.gridColorInfo = self.findColor( "gridColor", palette=(QPalette.Text,))
         self.gridColorInfo.setColor()
 
-        plotMode = objectDesc.getProperty("plotMode")   # plotNPtsAndStop, plotLastNPts (0, 1)
+        self.plotMode = objectDesc.getProperty("plotMode")   # plotNPtsAndStop, plotLastNPts (0, 1)
         xAxisTimeFormat = objectDesc.getProperty("xAxisTimeFormat") # 'seconds', 'dateTime'
         plotTitle = objectDesc.getProperty("graphTitle", "")
         self.border = objectDesc.checkProperty("border")
@@ -519,7 +691,8 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
     def buildCurve(self, curveIdx,rebuild=False):
         '''
             build a single curve.
-            How to preserve plot data when rebuilding? not easily done!
+            How to preserve plot data when rebuilding? not easily done! Rolling time plots
+            can, if history files are in use (see plotSource.enableHistory)
 
         '''
         if self.debug(1) : print("Generating curve", curveIdx)
@@ -559,8 +732,10 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
         curve.setLogMode(xlog, ylog)
 
         curve.updateMode = self.plotUpdateMode[curveIdx]
+        curve.scope = self.opMode[curveIdx] == self.opModeEnum.scope
         curve.lastX = None   # used for xAndY, maybe xOrY(?). If None, no input value
         curve.lastY = None   # ditto
+        curve.dirty = False  # set when there is data not yet passed to pyqtgraph
         if self.lineStyle[curveIdx] == self.lineStyleEnum.solid:
             dash = Qt.SolidLine
         else:
@@ -569,8 +744,13 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
         curve.setPen( pen)
         if changed:
             curve.nPts = self.npts
-            curve.edmXdata = collections.deque(maxlen=self.npts )
-            curve.edmYdata = collections.deque( maxlen=self.npts )
+            curve.edmXdata = ringBuffer(self.npts)
+            curve.edmYdata = ringBuffer(self.npts)
+            curve.envelope = minMaxEnvelope()
+            curve.decimated = False
+            curve.plotKey = None
+            curve.history = None
+            curve.plotSource = None
 
         # if rebuilding, need to remove then add the curve.
         if changed:
@@ -592,12 +772,17 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
         if changed:
             if curve.yPv:
                 curve.yPv.del_callback(self)
-            curve.yPv = self.pvConnect(self.yPv, curveIdx, self.yDataCallback, ( curve, 0, 0 ) )
+            if curve.xPv is None and curve.updateMode == self.updateModeEnum.y:
+                self.joinSource(curve, curveIdx)
+            else:
+                curve.yPv = self.pvConnect(self.yPv, curveIdx, self.yDataCallback, ( curve, 0, 0 ) )
         if self.debug(): print('xyPlotData build curve', curve.xPv, curve.yPv, curve.updateMode)
 
     def destroyCurve(self, curve):
         ''' destroyCurve - undo curve connections
         '''
+        if curve.plotSource is not None:
+            curve.plotSource.leave(curve)
         if curve.yPv:
             curve.yPv.del_callback(self)
         if curve.xPv:
@@ -619,6 +804,24 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
         prefix, newname = expandPVname(nameList[idx], macroTable=self.findMacroTable())
         return oldRef.getPVname() != '\\'.join([prefix,newname])
 
+    def joinSource(self, curve, idx):
+        ''' joinSource - connect a curve of a y PV against time or sample number to the shared
+            plotSource for the PV, creating it if needed.
+        '''
+        if self.yPv is None or len(self.yPv) <= idx or self.yPv[idx] is None or self.yPv[idx] == "":
+            return
+        prefix, name = expandPVname(self.yPv[idx], macroTable=self.findMacroTable())
+        timeBase = self.xAxisStyle.value >= 2
+        key = ('\\'.join([prefix,name]), curve.updateMode.name, self.xAxisStyle.name if timeBase else "index")
+        source = plotSources.get(key)
+        if source is None:
+            source = plotSource(key, self.yPv[idx], self.findMacroTable(), timeBase)
+            plotSources[key] = source
+        source.join(curve, self, self.npts)
+        # a rolling plot of a PV against time keeps older history, to show when zoomed out
+        if self.xAxisStyle.value == 2 and self.plotMode == self.plotModeEnum.plotLastNPts and self.historyTiers > 0:
+            source.enableHistory(self.historyTiers, self.historyFactor, self.historyLength, self.historyFileLength)
+
     def pvConnect( self, nameList, idx, callback=None, callbackArgs=None):
         if nameList is None or len(nameList) <= idx or nameList[idx] is None or nameList[idx] == "":
             return None
@@ -670,6 +873,8 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
         # check to see if trigger on Y
         num = args['count']
         if curve.updateMode == self.updateModeEnum.y:
+            # Only curves with an x PV get here: without one, a plotSource
+            # plots y against time or sample number.
             # if returning one data point, add it to the data list.
             # if returning an array of points, rewrite the data list
             if num <= 1:
@@ -678,33 +883,20 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
                 curve.edmYdata.append(args['value'])
             else:
                 if curve.edmYdata.maxlen < num:
-                    curve.edmYdata = collections.deque(maxlen=num)
-                    curve.edmXdata = collections.deque(maxlen=num)
-                curve.edmYdata.clear()
-                curve.edmYdata.extend([ float(v) for v in args['value'] ])
-
-            if curve.xPv is None:
-                if self.xAxisStyle.value >= 2:  # time, log10(time)
-                    # plot against time when the y PV updates
-                    curve.edmXdata.append( time.time() )
-                elif self.xAxisStyle.value < 2: # x, log(x)
-                    # auto-generate some x data: regular x or log(x)
-                    curve.edmXdata.clear()
-                    curve.edmXdata.extend([ xn for xn in range(0, len(curve.edmYdata))] )
-                try:
-                    if self.updateTimerMs == 0:
-                        curve.setData(list(curve.edmXdata),list(curve.edmYdata))
-                        redisplay(self)
-                except RuntimeError as exc:
-                    print(f"monitorXYgraph yDataCallback runtime exception {exc}")
-            else:
-                # have x data - use X and Y directly
-                self.setOneXY(curve)
+                    curve.edmYdata = ringBuffer(num)
+                    curve.edmXdata = ringBuffer(num)
+                curve.edmYdata.replace(args['value'])
+            # have x data - use X and Y directly
+            self.setOneXY(curve)
             return
-        # When running "x" or "trigger", just store the value and let the other update handle it.
+        # When running "trigger", stage the value for the next trigger.
+        # When running "x", just store the value and let the other update handle it.
         #
+        if curve.updateMode == self.updateModeEnum.trigger:
+            self.stage.put(curve, 1, args['value'], num)
+            return
         curve.lastY = onePVvalue(args['value'], num)
-        if curve.updateMode == self.updateModeEnum.trigger or curve.updateMode == self.updateModeEnum.x:
+        if curve.updateMode == self.updateModeEnum.x:
             return
 
         #when running "xAndY", if we've had two both X and Y PVs update, then plot
@@ -740,15 +932,17 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
                     curve.edmYdata.popleft()
                 curve.edmXdata.append(args['value'])
             else:
-                curve.edmXdata.clear()
-                curve.edmXdata.extend(args['value'])
+                curve.edmXdata.replace(args['value'])
             if curve.yPv is None:   # not sure where this case is valid?
                 return
             self.setOneXY(curve)
             return
 
+        if curve.updateMode == self.updateModeEnum.trigger:
+            self.stage.put(curve, 0, args['value'], num)
+            return
         curve.lastX = onePVvalue(args['value'], num)
-        if curve.updateMode == self.updateModeEnum.y or curve.updateMode == self.updateModeEnum.trigger:
+        if curve.updateMode == self.updateModeEnum.y:
             return
 
         #when running "xAndY", if we've had two both X and Y PVs update, then plot
@@ -768,49 +962,50 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
     def triggerCallback(self, widget, **args):
         if getattr(self, "curves", None) == None:
             return
-        if self.debug() : print('xyPlotData triggerCallback', widget, args)
+        slots = self.stage.take()
+        if self.debug() : print('xyPlotData triggerCallback', widget, args, slots)
+        stale = False
         for curve in self.curves:
             if curve.updateMode != self.updateModeEnum.trigger:
                 continue
-            if self.debug() : print(f'xyPlotData triggerCallback curve {curve}\nlastx {curve.lastX},\nlasty {curve.lastY},\nxdata= {curve.edmXdata}\nydata= {curve.edmYdata}')
-            if curve.lastX is None:
-                if curve.xPv is not None and len(curve.edmXdata) > 0:
-                    curve.edmXdata.append(curve.edmXdata[-1])
-            else:
-                if curve.lastX.count > 1:
-                    curve.edmXdata.clear()
-                    curve.edmXdata.extend(curve.lastX.value)
-                else:
-                    curve.edmXdata.append(curve.lastX.value)
-                curve.lastX = None
-
-            if curve.lastY is None:
-                if curve.yPv is not None and len(curve.edmYdata) > 0:
-                    curve.edmYdata.append(curve.edmYdata[-1])
+            newX, newY = slots.get((curve, 0)), slots.get((curve, 1))
+            if (curve.xPv is not None and newX is None) or (curve.yPv is not None and newY is None):
+                stale = True
+            self.captureTrigger(curve, newX, newY)
+        if stale:
+            self.stage.stale += 1
+            if self.debug() : print(f'xyPlotData trigger {self.stage.triggers} before all inputs updated: {self.stage.stale} so far')
+
+    def captureTrigger(self, curve, newX, newY):
+        ''' captureTrigger - add the values staged for a curve to its data. An input without a new
+            value holds its last value, unless the other has a new array. x and y are then matched
+            in length: waveforms are kept from their first value, and histories of single values
+            from their most recent.
+        '''
+        if self.debug() : print(f'xyPlotData triggerCallback curve {curve}\nnewX {newX},\nnewY {newY},\nxdata= {curve.edmXdata}\nydata= {curve.edmYdata}')
+        waveform = (newX is not None and newX.count != 1) or (newY is not None and newY.count != 1)
+        for new, data, pv in ( (newX, curve.edmXdata, curve.xPv), (newY, curve.edmYdata, curve.yPv) ):
+            if new is None:
+                if pv is not None and len(data) > 0 and not waveform:
+                    data.append(data[-1])
+            elif new.count != 1:
+                data.replace(new.value)
             else:
-                if curve.lastY.count != 1:
-                    curve.edmYdata.clear()
-                    curve.edmYdata.extend([val for val in curve.lastY.value])
-                else:
-                    curve.edmYdata.append(curve.lastY.value)
-                curve.lastY = None
-
-            if len(curve.edmXdata) == 0:
-                if len(curve.edmYdata) == 0:
-                    continue
-            if curve.xPv is None:
-                curve.edmXdata.clear()
-                curve.edmXdata.extend( list(range(1, len(curve.edmYdata)+1)))
-            if curve.yPv is None:
-                curve.edmYdata.clear()
-                curve.edmYdata.extend(list(range(1, len(curve.edmXdata)+1)))
-
-            try:
-                if self.updateTimerMs == 0 and len(curve.edmYdata) > 0 and len(curve.edmXdata) > 0:
-                    curve.setData(x=list(curve.edmXdata), y=list(curve.edmYdata))
-            except RuntimeError as exc:
-                print(f"monitorXYgraph triggerCallback runtime exception {exc}")
+                data.append(new.value)
 
+        if len(curve.edmXdata) == 0:
+            if len(curve.edmYdata) == 0:
+                return
+        if curve.xPv is None:
+            curve.edmXdata.replace(np.arange(1, len(curve.edmYdata)+1))
+        if curve.yPv is None:
+            curve.edmYdata.replace(np.arange(1, len(curve.edmXdata)+1))
+        num = min(len(curve.edmXdata), len(curve.edmYdata))
+        for data in (curve.edmXdata, curve.edmYdata):
+            if len(data) > num:
+                values = data.view()
+                data.replace(values[:num].copy() if waveform else values[-num:].copy())
+        self.markDirty(curve)
 
     def setMatchedData(self, curve):
         ''' stretch the shorter of x or y lists out to make the lists equal length.
@@ -820,15 +1015,10 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
             return
         diff = len(curve.edmYdata) - len(curve.edmXdata)
         if diff < 0:
-            curve.edmYdata.extend([curve.edmYdata[-1]]*-diff)
+            curve.edmYdata.extend(np.full(-diff, curve.edmYdata[-1]))
         elif diff > 0:
-            curve.edmXdata.extend([curve.edmXdata[-1]]*diff)
-        try:
-            if self.updateTimerMs == 0:
-                curve.setData(x=list(curve.edmXdata), y=list(curve.edmYdata))
-                redisplay(self)
-        except RuntimeError as exc:
-            print(f"monitorXYgraph setMatchedData runtime exception {exc}")
+            curve.edmXdata.extend(np.full(diff, curve.edmXdata[-1]))
+        self.markDirty(curve)
 
     def setOneXY(self, curve):
         '''
@@ -837,22 +1027,146 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
         '''
         if curve.lastX is not None and curve.lastX.value is not None:
             if curve.lastX.count > 1:
-                curve.edmXdata.clear()
-                curve.edmXdata.extend(curve.lastX.value)
+                curve.edmXdata.replace(curve.lastX.value)
             else:
                 curve.edmXdata.append(curve.lastX.value)
             curve.lastX.value = None
 
         if curve.lastY is not None:
             if curve.lastY.count > 1:
-                curve.edmYdata.clear()
-                curve.edmYdata.extend(curve.lastY.value)
+                curve.edmYdata.replace(curve.lastY.value)
             else:
                 curve.edmYdata.append(curve.lastY.value)
             curve.lastY = None
 
         self.setMatchedData(curve)
 
+    def markDirty(self, curve):
+        ''' markDirty - note that the curve has new data. The data is passed to pyqtgraph
+            once per frame from redisplay, rather than on every PV update. With
+            an update timer, redisplay is left for the timer to request.
+        '''
+        curve.dirty = True
+        if self.updateTimerMs == 0:
+            redisplay(self)
+
+    def exportData(self, filename):
+        ''' exportData - save the data of each curve, and of any history tiers, as arrays in a NumPy .npz file '''
+        arrays = {}
+        for idx, curve in enumerate(self.curves or []):
+            if curve.plotSource is not None:
+                curve.plotSource.sync()
+            arrays[f"x{idx}"] = curve.edmXdata.view()
+            arrays[f"y{idx}"] = curve.edmYdata.view()
+            if curve.history is not None:
+                for level, tier in enumerate(curve.history.tiers, start=1):
+                    for name in ("x", "low", "high", "mean"):
+                        arrays[f"tier{level}_{name}{idx}"] = getattr(tier, name).view()
+        np.savez(filename, **arrays)
+
+    def onSaveData(self):
+        filename, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Save Plot Data", "", "NumPy archive (*.npz)")
+        if filename == "":
+            return
+        try:
+            self.exportData(filename)
+        except OSError as exc:
+            print(f"Unable to save plot data to {filename}: {exc}")
+
+    def viewChanged(self, *args):
+        ''' viewChanged - the x range or size of the plot has changed, so decimated curves need recomputing '''
+        redraw = False
+        zoomed = not self.getViewBox().autoRangeEnabled()[0]
+        for curve in getattr(self, "curves", None) or []:
+            if curve.decimated or (zoomed and curve.history is not None):
+                curve.dirty = redraw = True
+        if redraw:
+            redisplay(self)
+
+    def curveData(self, curve):
+        ''' curveData - the x and y arrays to plot, and a key that is None unless the arrays depend only on
+            the key. When the x range has been zoomed out past the oldest point of a curve with a
+            historyStore, the older part of the range is drawn from the history.
+        '''
+        x, y, key = self.recentData(curve)
+        vb = self.getViewBox()
+        if curve.history is None or vb.autoRangeEnabled()[0]:
+            return x, y, key
+        xmin, xmax = vb.viewRange()[0]
+        oldest = curve.edmXdata[0]
+        if xmin >= oldest:
+            return x, y, key
+        hx, hy = curve.history.points(xmin, xmax, oldest, self.decimateFactor*vb.width())
+        if len(hx) == 0:
+            return x, y, key
+        return np.concatenate((hx, x)), np.concatenate((hy, y)), None
+
+    def recentData(self, curve):
+        ''' recentData - the x and y arrays to plot from the curve buffers, and a key that is None unless they are decimated.
+            When a curve has many more points than the plot is wide, it is reduced to the lowest and
+            highest point of each pixel-sized bin of the visible x range. Decimation needs x to rise,
+            as it does when plotting against time or sample number.
+        '''
+        x, y = curve.edmXdata.view(), curve.edmYdata.view()
+        curve.decimated = False
+        vb = self.getViewBox()
+        width = vb.width()
+        if len(y) <= self.decimateFactor*width or width < 1 or self.xAxisStyle.value in (1, 3):
+            return x, y, None
+        if vb.autoRangeEnabled()[0]:
+            xmin, xmax = None, None         # x range follows the data: use it all
+            span = x[-1] - x[0]
+        else:
+            xmin, xmax = vb.viewRange()[0]
+            span = xmax - xmin
+        if not span > 0:
+            return x, y, None
+        binWidth = 2.0**math.floor(math.log2(span/width))     # one or two bins per pixel
+        if not curve.envelope.update(curve.edmXdata, curve.edmYdata, binWidth):
+            return x, y, None
+        curve.decimated = True
+        lo, hi = curve.envelope.visible(xmin, xmax)
+        key = (binWidth, lo, hi, curve.edmXdata.total, curve.edmYdata.total, curve.edmXdata.generation, curve.edmYdata.generation)
+        first, last = curve.envelope.samples(lo, hi)
+        if len(y[first:last]) <= self.decimateFactor*width:
+            return x[first:last], y[first:last], key       # zoomed in far enough to draw every point
+        return (*curve.envelope.points(lo, hi), key)
+
+    def updateCurves(self):
+        ''' updateCurves - pass the data of changed curves to pyqtgraph '''
+        for curve in self.curves or []:
+            if not curve.dirty:
+                continue
+            curve.dirty = False
+            if curve.plotSource is not None:
+                if curve.scope and curve.plotSource.waveform is not None and not curve.plotSource.timeBase:
+                    self.setWaveform(curve, curve.plotSource.waveform)
+                    continue
+                curve.plotSource.sync()
+                curve.plotSource.updateHistory()
+            if len(curve.edmXdata) == 0 or len(curve.edmYdata) == 0:
+                continue
+            x, y, key = self.curveData(curve)
+            if key != None and key == curve.plotKey:
+                continue
+            curve.plotKey = key
+            try:
+                curve.setData(x, y, skipFiniteCheck=False, connect="auto")     # as before any setWaveform
+            except RuntimeError as exc:
+                print(f"monitorXYgraph updateCurves runtime exception {exc}")
+
+    def setWaveform(self, curve, y):
+        ''' setWaveform - scope mode: plot the whole of the latest waveform against sample number.
+            The array from the PV is passed to pyqtgraph as it is, without decimation or checks
+            for gaps, and x is a cached array for each length.
+        '''
+        curve.decimated = False
+        curve.plotKey = None
+        try:
+            curve.setData(indexArray(len(y)), y, skipFiniteCheck=True, connect="all")
+        except RuntimeError as exc:
+            print(f"monitorXYgraph setWaveform runtime exception {exc}")
+
     def resetCallback(self, widget, **args):
         '''
             edm 105F has ~300 lines of code to reset limits
@@ -877,6 +1191,7 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
             self.y2.setGeometry(self.getViewBox().sceneBoundingRect())
             self.y2.linkedViewChanged(self.getViewBox(), self.y2.XAxis)
 
+        self.updateCurves()
         self.replot()
 
     def drawBorder(self):
@@ -898,12 +1213,6 @@ class xyGraphClass(pgraph.PlotWidget, edmWidget):
             Alternative to redisplaying as-it-happens
         '''
         if self.debug() : print('timerEvent')
-        for curve in self.curves:
-            if len(curve.edmXdata) > 0 and len(curve.edmYdata) > 0:
-                try:
-                    curve.setData(list(curve.edmXdata), list(curve.edmYdata))
-                except RuntimeError as exc:
-                    print(f"monitorXYgraph timerEvent runtime exception {exc}")
         redisplay(self)
         return
 
@@ -4,8 +4,9 @@
 from enum import Enum
 
 from .edmApp import edmApp, redisplay
+from .edmFont import getFontMetrics
 from .edmWidget import edmWidget, pvItemClass
-from .edmTextFormat import convDefault, convDecimal, convHex, convEngineer, convExp
+from .edmTextFormat import convDefault, convDecimal, convHex, convEngineer, convExp, buildFormatter
 from .edmPVfactory import edmPVbase
 from .edmField import edmField
 from .edmEditWidget import edmEdit
@@ -62,6 +63,8 @@ class activeXTextDspClass_noedit(QLineEdit,edmWidget):
         super().__init__(parent)
         self.pvItem["nullPv"] = pvItemClass("nullPVname", "nullPV")
         self.nullCondition = None
+        self.formatter = None
+        self.formatterKey = None
 
     def buildFromObject(self, objectDesc, **kw):
         super().buildFromObject(objectDesc, **kw)
@@ -74,8 +77,9 @@ class activeXTextDspClass_noedit(QLineEdit,edmWidget):
         self.precisionFromDb = objectDesc.getProperty("limitsFromDb")
         self.nullCondition = objectDesc.getProperty("nullCondition")
         self.autoHeight = objectDesc.getProperty("autoHeight") 
+        self.formatterKey = None
         if self.autoHeight or edmApp.autosize:
-            fm = QFontMetrics(self.edmFont)
+            fm = getFontMetrics(self.edmFont)
             h = fm.height()
             delta = h - self.height() + 2
             if delta > 0:
@@ -104,6 +108,15 @@ class activeXTextDspClass_noedit(QLineEdit,edmWidget):
     def findBgColor(self):
         edmWidget.findBgColor( self, palette=(QPalette.Base,))
 
+    def getFormatter(self, precision):
+        ''' getFormatter(precision) - the formatter for the format, rebuilt if the precision or units change '''
+        key = (precision, self.controlPV.units)
+        if key != self.formatterKey:
+            self.formatter = buildFormatter(self.displayModeList[self.formatType], precision,
+                                self.controlPV.units, self.showUnits)
+            self.formatterKey = key
+        return self.formatter
+
     def redisplay(self, **kw):
         ''' determine how to format text for display'''
         if getattr(self, "controlPV", None) == None:  # Where does this come from?
@@ -118,17 +131,13 @@ class activeXTextDspClass_noedit(QLineEdit,edmWidget):
             try:
                 if self.precisionFromDb and hasattr(self.controlPV, "precision"):
                     precision = self.controlPV.precision
-                txt = self.displayModeList[self.formatType] (self.controlPV.value,
-                                                        charValue=self.controlPV.char_value,
-                                                        precision=precision,
-                                                        units=self.controlPV.units,
-                                                        showUnits=self.showUnits)
+                txt = self.getFormatter(precision)(self.controlPV.value, self.controlPV.char_value)
             except:
                 print("activeXTextDspClass:noedit : conversion failure")
                 txt = self.controlPV.char_value
 
         if edmApp.autosize:
-            fm = QFontMetrics(self.edmFont)
+            fm = getFontMetrics(self.edmFont)
             bounds = fm.boundingRect(txt)
             delta = bounds.width() - self.width() + 2
             if delta > 0:
@@ -138,6 +147,7 @@ class activeXTextDspClass_noedit(QLineEdit,edmWidget):
                 geometry.setWidth(bounds.width()+2)
                 self.setGeometry(geometry)
 
-        self.setText(txt)
+        if txt != self.text():      # setText relays out the line edit, even for the same text
+            self.setText(txt)
 
 edmApp.edmClasses["activeXTextDspClass:noedit"] = activeXTextDspClass_noedit
@@ -6,6 +6,7 @@ from __future__ import print_function
 from enum import Enum
 
 from .edmApp import edmApp
+from .edmFont import getFontMetrics
 from .edmWidget import edmWidget, pvItemClass
 from .edmAbstractShape import abstractShape
 from .edmEditWidget import edmEdit
@@ -147,7 +148,7 @@ class activeBarClass(abstractShape,edmWidget):
             label = self.label
 
         if label != None and label != "":
-            fm = QFontMetrics(self.edmFont)
+            fm = getFontMetrics(self.edmFont)
             box = fm.boundingRect(label)
             # always at the top, always reduce height
             y += box.height()
@@ -168,7 +169,7 @@ class activeBarClass(abstractShape,edmWidget):
             pen.setColor( self.fgColorInfo.setColor() )
             painter.setPen(pen)
             painter.setFont(self.edmFont)
-            fm = QFontMetrics(self.edmFont)
+            fm = getFontMetrics(self.edmFont)
 
             drawmin = self.fmt % (self.rmin,)
             drawmax = self.fmt % (self.rmax,)
@@ -5,17 +5,25 @@ from enum import Enum
 from .edmPVfactory import edmPVbase
 from .edmApp  import edmApp
 from .edmWidget import edmWidget
-from .edmTextFormat import convDefault, convDecimal, convHex, convEngineer, convExp
+from .edmTextFormat import convDefault, convDecimal, convHex, convEngineer, convExp, buildFormatter
 from .edmField import edmField
 from .edmEditWidget import edmEdit
 
-from PyQt5.QtWidgets import QLineEdit
-from PyQt5.QtGui import QPalette
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtGui import QPalette, QPainter, QStaticText, QTransform
+from PyQt5.QtCore import Qt, QPointF
 
+# textupdateSupport holds the fields and formatting shared by TextupdateClass
+# and TextentryClass (controltextentry), which is still a QLineEdit.
+#
+# TextupdateClass draws its text directly, rather than through a read-only QLineEdit.
+# The layout matches QLineEdit without a frame: a 2 pixel side margin, the text
+# centred vertically, and the end of the text shown if it is too long to fit.
+# Formatting is skipped if the value has not changed, and the widget is only
+# repainted if the text has changed. Prepared QStaticText is kept for recent
+# strings, so values that alternate between a few states are not laid out again.
 
-class TextupdateClass(QLineEdit,edmWidget):
-    menuGroup = [ "monitor", "Text Update" ]
+class textupdateSupport(edmWidget):
     displayModeEnum = Enum("displayMode", "default decimal hex engineer exp", start=0)
     displayModeList = {
                                 displayModeEnum(0) : convDefault,
@@ -38,18 +46,22 @@ class TextupdateClass(QLineEdit,edmWidget):
 
     edmFieldList = edmWidget.edmBaseFields + edmWidget.edmColorFields  + edmEntityFields + edmWidget.edmFontFields + edmWidget.edmVisFields
 
-    def __init__(self, parent=None):
-        super().__init__(parent)
+    skipUnchanged = False       # if True, don't format or set the text when the value is unchanged
+
+    def __init__(self, parent=None, **kw):
+        super().__init__(parent, **kw)
         self.haveFocus = 0
+        self.lastValue = None
+        self.formatter = None
+        self.formatterKey = None
 
     def buildFromObject(self, objectDesc, **kw):
         super().buildFromObject( objectDesc, **kw)
-        self.setReadOnly(1)
-        self.setFrame(0)
-        self.setFocusPolicy(Qt.NoFocus)
         self.precision = self.objectDesc.getProperty("precision", 0)
         # note that V3 and V4 switch int and string values. Use of Enum sorts this out at a lower level
         self.displayMode = self.objectDesc.getProperty("displayMode", "default")
+        self.formatterKey = None
+        self.lastValue = None
 
     # unfortunately, TextupdateClass has its own configuration for
     # determining background color (use parent the default, unless
@@ -61,6 +73,15 @@ class TextupdateClass(QLineEdit,edmWidget):
     def findFgColor(self):
         edmWidget.findFgColor( self, palette=(QPalette.Text,))
 
+    def getFormatter(self):
+        ''' getFormatter - the formatter for the display mode, rebuilt if the precision or units change '''
+        key = (self.precision, self.controlPV.units)
+        if key != self.formatterKey:
+            self.formatter = buildFormatter(self.displayModeList[self.displayMode], self.precision,
+                                self.controlPV.units, showUnits=(self.displayMode == "default"))
+            self.formatterKey = key
+        return self.formatter
+
     def redisplay(self, **kw):
         if not hasattr(self, "controlPV") or self.controlPV == None:
             return
@@ -73,15 +94,93 @@ class TextupdateClass(QLineEdit,edmWidget):
             if self.precision == 0:
                 self.precision = self.controlPV.precision
         except: pass
+        value = self.controlPV.value
+        if self.skipUnchanged and type(value) in (int, float, str):
+            key = (value, self.controlPV.char_value, self.precision, self.controlPV.units, self.displayMode)
+            if key == self.lastValue:
+                return
+            self.lastValue = key
+        else:
+            self.lastValue = None
         try:
             if self.controlPV.pvType == edmPVbase.typeEnum:  # the hard decisions have already been made.
                 self.setText(self.controlPV.char_value)
                 return
-            txt = self.displayModeList[self.displayMode](self.controlPV.value, charValue=self.controlPV.char_value, precision=self.precision, units=self.controlPV.units,showUnits=(self.displayMode == "default") )
+            txt = self.getFormatter()(value, self.controlPV.char_value)
             self.setText(txt)
             return
         except:
             print("Textupdate: conversion failure")
         self.setText(self.controlPV.char_value)
 
+class TextupdateClass(QWidget,textupdateSupport):
+    menuGroup = [ "monitor", "Text Update" ]
+    horizontalMargin = 2        # as QLineEdit
+    staticTextMax = 16          # number of recent strings kept ready to draw
+    skipUnchanged = True
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.txt = ""
+        self.alignment = Qt.AlignLeft
+        self.staticText = {}
+
+    def buildFromObject(self, objectDesc, **kw):
+        super().buildFromObject( objectDesc, **kw)
+        self.setFocusPolicy(Qt.NoFocus)
+
+    def setAlignment(self, alignment):
+        self.alignment = alignment
+        self.update()
+
+    def text(self):
+        return self.txt
+
+    def setText(self, txt):
+        ''' setText(txt) - repaint only if the text has changed '''
+        if txt == self.txt:
+            return
+        self.txt = txt
+        self.update()
+
+    def changeEvent(self, event):
+        if event.type() == event.FontChange:
+            self.staticText.clear()
+            self.update()
+        super().changeEvent(event)
+
+    def getStaticText(self, txt):
+        ''' getStaticText(txt) - QStaticText for 'txt', prepared for the current font '''
+        staticText = self.staticText.get(txt)
+        if staticText == None:
+            if len(self.staticText) >= self.staticTextMax:
+                self.staticText.clear()
+            staticText = QStaticText(txt)
+            staticText.setTextFormat(Qt.PlainText)
+            staticText.prepare(QTransform(), self.font())
+            self.staticText[txt] = staticText
+        return staticText
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        pal = self.palette()
+        painter.fillRect(self.rect(), pal.brush(QPalette.Base))
+        if self.txt != "":
+            staticText = self.getStaticText(self.txt)
+            fmHeight = self.fontMetrics().height()
+            width = self.width() - 2*self.horizontalMargin
+            textWidth = round(staticText.size().width())
+            used = textWidth + 1                # QLineEdit allows for the cursor
+            x = self.horizontalMargin
+            if used > width:
+                x += width - 1 - textWidth      # QLineEdit shows the end of the text
+            elif self.alignment & Qt.AlignRight:
+                x += width - used - 1
+            elif self.alignment & Qt.AlignHCenter:
+                x += (width - used)//2
+            y = (self.height() - fmHeight + 1)//2
+            painter.setPen(pal.color(QPalette.Text))
+            painter.drawStaticText(QPointF(x, y), staticText)
+        painter.end()
+
 edmApp.edmClasses["TextupdateClass"] = TextupdateClass